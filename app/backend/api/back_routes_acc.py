@@ -1,32 +1,90 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..db.database import SessionLocal
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db.async_database import get_async_read_db, read_session_factory
 from ..services import services_accueil
+from ..db import schemas
+from ..services.services_versions import CATEGORIES, TRANSACTIONS
+from . import metrics
+from .conditional import conditional_get
+from .responses import fast_json
 
-router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
+# Toutes les routes du dashboard dépendent des transactions et des catégories
+router = APIRouter(
+    prefix="/api/dashboard",
+    tags=["Dashboard"],
+    dependencies=[Depends(conditional_get(TRANSACTIONS, CATEGORIES))],
+)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Sections indépendantes de /stats : calculées en parallèle, une connexion chacune.
+# La première réutilise la session de conditional_get (déjà empruntée pour les
+# versions) : len(STATS_SECTIONS) connexions par requête, pas une de plus.
+STATS_SECTIONS = {
+    "balance": services_accueil.get_total_balance_async,
+    "bar": services_accueil.get_last_3_months_stats_async,
+    "pie": services_accueil.get_category_pie_stats_async,
+    "category_totals": services_accueil.get_category_totals_async,
+}
+
+async def _timed_section(session_factory, service, db: AsyncSession | None = None):
+    start = time.perf_counter()
+    if db is not None:
+        result = await service(db)
+    else:
+        async with session_factory() as own_db:
+            result = await service(own_db)
+    return result, time.perf_counter() - start
 
 @router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    return {
-        "balance": services_accueil.get_total_balance(db),
+async def get_dashboard_stats(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Le temps de chaque section est renvoyé dans l'en-tête Server-Timing
+    (visible dans l'onglet Réseau du navigateur).
+    db : la session de conditional_get (même dépendance, résolue une fois par requête)
+    """
+    start = time.perf_counter()
+    session_factory = read_session_factory(request)
+    first, *others = STATS_SECTIONS.values()
+    results = await asyncio.gather(
+        _timed_section(session_factory, first, db),
+        *(_timed_section(session_factory, service) for service in others),
+    )
+    sections = dict(zip(STATS_SECTIONS, results))
+
+    timings = [f"{name};dur={elapsed * 1000:.1f}" for name, (_, elapsed) in sections.items()]
+    timings.append(f"stats;dur={(time.perf_counter() - start) * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(timings)
+
+    return fast_json({
+        "balance": sections["balance"][0],
         "charts": {
-            "bar": services_accueil.get_last_3_months_stats(db),
-            "pie": services_accueil.get_category_pie_stats(db),
+            "bar": sections["bar"][0],
+            "pie": sections["pie"][0],
         },
-        "category_totals": services_accueil.get_category_totals(db),
-    }
+        "category_totals": sections["category_totals"][0],
+    }, response)
 
-@router.get("/category-totals/")
-def get_dashboard_category_totals(
+@router.get("/category-totals/", response_model=list[schemas.CategoryTotal])
+async def get_dashboard_category_totals(
+    response: Response,
     period: str = "current_month",
     category_id: int | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    totals = await services_accueil.get_category_totals_filtered_async(db, period, category_id)
+    metrics.observe_rows("/api/dashboard/category-totals/", len(totals))
+    return fast_json(totals, response)
+
+@router.get("/series")
+async def get_dashboard_series(
+    months: int = Query(3, ge=1, le=120),
+    granularity: str = Query("month", pattern="^(month|week|day)$"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    return services_accueil.get_category_totals_filtered(db, period, category_id)
+    """Séries revenus / dépenses des N derniers mois pour le graphique en bâtons"""
+    try:
+        return await services_accueil.get_income_expense_series_async(db, months, granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
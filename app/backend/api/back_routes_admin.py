@@ -0,0 +1,63 @@
+import hmac
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+
+from ..db.async_database import async_engine, async_read_engine
+from ..db.database import engine, read_engine
+from ..db.pool import pool_settings, pool_status
+from ..db.slow_queries import slow_query_log
+from ..services import services_invalidation
+from ..services.services_cache import result_cache
+
+# Routes internes : hors de /api/, elles ne passent pas par le reverse proxy nginx.
+# Le port 8000 peut toutefois être joignable (docker-compose le publie, Service
+# du cluster) : chaque appel doit aussi porter X-Internal-Token (INTERNAL_TOKEN),
+# ou, sans jeton configuré, venir de la machine elle-même (kubectl port-forward,
+# docker exec). Sinon 404, comme /api/metrics derrière nginx.
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "")
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def require_internal_access(request: Request, x_internal_token: str | None = Header(None)):
+    if INTERNAL_TOKEN:
+        allowed = x_internal_token is not None and hmac.compare_digest(x_internal_token, INTERNAL_TOKEN)
+    else:
+        allowed = request.client is not None and request.client.host in LOOPBACK_HOSTS
+    if not allowed:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(
+    prefix="/internal", tags=["Interne"], include_in_schema=False,
+    dependencies=[Depends(require_internal_access)],
+)
+
+@router.get("/pool")
+def get_pool_metrics():
+    """État des pools de connexions (sync pour les scripts/import, async pour les routes)"""
+    pools = {
+        "settings": pool_settings(),
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.sync_engine.pool),
+    }
+    if read_engine is not engine:
+        pools["read_sync"] = pool_status(read_engine.pool)
+        pools["read_async"] = pool_status(async_read_engine.sync_engine.pool)
+    return pools
+
+@router.get("/cache")
+def get_cache_metrics():
+    """Cache des agrégats du dashboard : taille, hits/misses par fonction et invalidations reçues"""
+    return {**result_cache.snapshot(), "invalidation": services_invalidation.snapshot()}
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: int | None = Query(None, ge=1)):
+    """Dernières requêtes SQL lentes de ce processus (paramètres, service appelant, plan échantillonné)"""
+    return slow_query_log.snapshot(limit)
+
+@router.delete("/slow-queries")
+def clear_slow_queries():
+    """Vide le journal (ex : pour vérifier l'effet d'un correctif)"""
+    slow_query_log.clear()
+    return {"cleared": True}
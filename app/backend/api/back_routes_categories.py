@@ -1,41 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from ..db.database import SessionLocal
-from ..services import services_categories
+from ..db.async_database import get_async_db
+from ..services import services_categories, services_transactions
 from ..db import schemas
+from ..services.services_versions import CATEGORIES, TRANSACTIONS
+from . import metrics
+from .conditional import conditional_get
+from .responses import fast_json
 
 router = APIRouter(prefix="/api/categories", tags=["Categories"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Validation + sérialisation par pydantic-core (voir responses.py)
+CATEGORY_NODES = TypeAdapter(List[schemas.CategoryNode])
+CATEGORY_TREE = TypeAdapter(List[schemas.CategoryTreeNode])
+CATEGORY_DETAIL = TypeAdapter(schemas.CategoryDetail)
 
-@router.get("/", response_model=List[schemas.Category])
-def list_categories(db: Session = Depends(get_db)):
-    """Affiche toutes les catégories (incluant l'arbre hiérarchique)"""
-    return services_categories.get_categories(db)
+@router.get("/", response_model=List[schemas.CategoryNode],
+            dependencies=[Depends(conditional_get(CATEGORIES, get_session=get_async_db))])
+async def list_categories(response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Affiche toutes les catégories (incluant l'arbre hiérarchique, sans les transactions)"""
+    nodes = await services_categories.get_categories_compact_async(db)
+    metrics.observe_rows("/api/categories/", len(nodes))
+    return fast_json(nodes, response, CATEGORY_NODES)
 
-@router.post("/", response_model=schemas.Category, status_code=status.HTTP_201_CREATED)
-def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_db)):
+@router.get("/tree", response_model=List[schemas.CategoryTreeNode],
+            dependencies=[Depends(conditional_get(CATEGORIES, TRANSACTIONS, get_session=get_async_db))])
+async def get_categories_tree(response: Response, with_totals: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Arbre compact des catégories pour les menus déroulants (totaux en option)"""
+    tree = await services_categories.get_category_tree_async(db, with_totals)
+    return fast_json(tree, response, CATEGORY_TREE)
+
+@router.get("/{category_id}", response_model=schemas.CategoryDetail,
+            dependencies=[Depends(conditional_get(CATEGORIES, TRANSACTIONS, get_session=get_async_db))])
+async def get_category(
+    category_id: int,
+    response: Response,
+    include: str | None = Query(None, pattern="^transactions$"),
+    limit: int = Query(services_transactions.DEFAULT_PAGE_SIZE, ge=1, le=services_transactions.MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Une catégorie ; include=transactions ajoute une page de ses transactions (sous-catégories incluses)"""
+    node = await services_categories.get_category_node_async(db, category_id)
+    if node is None:
+        raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+
+    transactions = None
+    if include == "transactions":
+        try:
+            items, next_cursor = await services_transactions.list_transactions_page_async(
+                db, category_id, "all", limit, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        transactions = {"items": items, "next_cursor": next_cursor}
+        metrics.observe_rows("/api/categories/{category_id}", len(items))
+
+    return fast_json({"category": node, "transactions": transactions}, response, CATEGORY_DETAIL)
+
+# Les routes d'écriture renvoient le noeud compact (via l'index) plutôt que l'objet ORM :
+# lire ses sous-catégories après coup déclencherait un chargement hors run_sync
+@router.post("/", response_model=schemas.CategoryNode, status_code=status.HTTP_201_CREATED)
+async def create_category(category: schemas.CategoryCreate, db: AsyncSession = Depends(get_async_db)):
     """Crée une nouvelle catégorie ou sous-catégorie"""
-    return services_categories.create_category(db, category)
+    created = await db.run_sync(services_categories.create_category, category)
+    return await db.run_sync(services_categories.get_category_node, created.id)
 
 
-@router.put("/{category_id}", response_model=schemas.Category)
-def update_category(category_id: int, category: schemas.CategoryUpdate, db: Session = Depends(get_db)):
-    updated = services_categories.update_category(db, category_id, category)
+@router.put("/{category_id}", response_model=schemas.CategoryNode)
+async def update_category(category_id: int, category: schemas.CategoryUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated = await db.run_sync(services_categories.update_category, category_id, category)
     if not updated:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Catégorie non trouvée")
-    return updated
+    return await db.run_sync(services_categories.get_category_node, updated.id)
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db)):
-    success = services_categories.delete_category(db, category_id)
+async def delete_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await db.run_sync(services_categories.delete_category, category_id)
     if not success:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Catégorie non trouvée")
@@ -1,98 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
-from sqlalchemy import or_
 
-from ..db.database import SessionLocal
-from ..db import models, schemas
-from ..services import services_transactions
+from ..db.async_database import get_async_db, get_async_read_db
+from ..db.database import ReadSessionLocal, SessionLocal, get_db
+from ..db.read_routing import is_pinned_to_primary
+from ..db import schemas
+from ..services import services_import, services_transactions
+from ..services.services_versions import CATEGORIES, TRANSACTIONS
+from . import metrics
+from .conditional import conditional_get
+from .responses import dumps, fast_json
 
 router = APIRouter(prefix="/api/transactions", tags=["Transactions"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.get("/", response_model=List[dict])
-def get_transactions_filtered(
+@router.get(
+    "/",
+    response_model=schemas.TransactionPage,
+    dependencies=[Depends(conditional_get(TRANSACTIONS, CATEGORIES))],
+)
+async def get_transactions_filtered(
+    request: Request,
+    response: Response,
     category_id: int | None = None,
     period: str | None = "current_month",
-    db: Session = Depends(get_db)
+    limit: int = Query(services_transactions.DEFAULT_PAGE_SIZE, ge=1, le=services_transactions.MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    search: str | None = Query(None, min_length=1, max_length=services_transactions.SEARCH_MAX_LENGTH),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     API unique pour lister et filtrer les transactions.
+    - format=json : une page { items, next_cursor } ; repasser next_cursor pour la suite.
+    - format=ndjson : toutes les lignes en flux (une transaction JSON par ligne).
+    - search : recherche sur le libellé (sous-chaîne, approchée sur PostgreSQL),
+      résultats classés par pertinence.
     """
-    query = db.query(models.Transaction).join(models.Category)
-    
-    if category_id:
-        query = query.filter(
-            or_(
-                models.Transaction.category_id == category_id,
-                models.Category.parent_id == category_id
-            )
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_transactions(category_id, period, search, is_pinned_to_primary(request)),
+            media_type="application/x-ndjson",
         )
 
-    today = date.today()
-    if period == "current_month":
-        start = today.replace(day=1)
-        query = query.filter(models.Transaction.date >= start)
-    elif period == "last_month":
-        start = (today.replace(day=1) - relativedelta(months=1))
-        end = today.replace(day=1) - timedelta(days=1)
-        query = query.filter(models.Transaction.date.between(start, end))
-    elif period == "last_3_months":
-        start = today - relativedelta(months=3)
-        query = query.filter(models.Transaction.date >= start)
-    elif period == "all":
-        pass 
+    try:
+        items, next_cursor = await services_transactions.list_transactions_page_async(
+            db, category_id, period, limit, cursor, search
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    results = query.order_by(models.Transaction.date.desc()).all()
+    metrics.observe_rows("/api/transactions/", len(items))
+    # Lignes construites par le service : encodage direct, sans revalidation
+    return fast_json({"items": items, "next_cursor": next_cursor}, response)
 
-    output = []
-    for t in results:
-        parent_name = "Autre"
-        if t.category:
-            parent_name = t.category.parent.name if t.category.parent else t.category.name
 
-        output.append({
-            "id": t.id,
-            "label": t.label,
-            "amount": t.amount,
-            "date": t.date.strftime("%d/%m/%Y"), # Format affichage FR
-            "category_name": t.category.name if t.category else "Autre",
-            "parent_name": parent_name,
-            "category_type": t.category.type if t.category else "depense",
-            "category_id": t.category_id,
-            "date_raw": t.date 
-        })
-    return output
+def _stream_transactions(category_id: int | None, period: str | None, search: str | None, primary: bool = False):
+    # Session dédiée : elle doit rester ouverte pendant tout l'envoi du flux
+    db = SessionLocal() if primary else ReadSessionLocal()
+    rows = 0
+    chunk = []
+    try:
+        # Encodage orjson (comme les réponses JSON) et un envoi par lot : chaque
+        # élément produit coûte un aller-retour vers le threadpool
+        for row in services_transactions.iter_transactions(db, category_id, period, search):
+            chunk.append(dumps(row))
+            rows += 1
+            if len(chunk) == services_transactions.STREAM_BATCH_SIZE:
+                yield b"\n".join(chunk) + b"\n"
+                chunk = []
+        if chunk:
+            yield b"\n".join(chunk) + b"\n"
+    finally:
+        db.close()
+        metrics.observe_rows("/api/transactions/", rows, "ndjson")
 
 @router.post("/", status_code=201)
-def create_transaction(transaction: schemas.TransactionCreate, db: Session = Depends(get_db)):
+async def create_transaction(transaction: schemas.TransactionCreate, db: AsyncSession = Depends(get_async_db)):
     """Création"""
-    return services_transactions.create_transaction(db, transaction)
+    return await db.run_sync(services_transactions.create_transaction, transaction)
+
+
+@router.post("/import")
+def import_transactions(
+    file: UploadFile = File(...),
+    format: str | None = Form(None, pattern="^(csv|ofx)$"),
+    default_category_id: int | None = Form(None),
+    default_income_category_id: int | None = Form(None),
+    default_expense_category_id: int | None = Form(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Import en masse d'un export bancaire (CSV ou OFX), traité en flux par lots.
+    Le format est déduit de l'extension du fichier s'il n'est pas précisé.
+    Lignes sans catégorie : crédits (montant > 0) vers default_income_category_id,
+    débits (montant < 0) vers default_expense_category_id.
+    Reste synchrone : lecture bloquante du fichier et COPY via psycopg2.
+    """
+    fmt = format or (file.filename or "").rsplit(".", 1)[-1].lower()
+    try:
+        return services_import.import_transactions(
+            db, file.file, fmt, default_category_id,
+            default_income_category_id=default_income_category_id,
+            default_expense_category_id=default_expense_category_id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch")
+async def batch_transactions(batch: schemas.TransactionBatch, db: AsyncSession = Depends(get_async_db)):
+    """
+    Modifications en masse (recatégorisation, corrections, suppressions)
+    en un seul appel et une seule transaction.
+    """
+    try:
+        return await db.run_sync(services_transactions.batch_update_transactions, batch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.put("/{transaction_id}")
-def update_transaction(transaction_id: int, transaction: schemas.TransactionUpdate, db: Session = Depends(get_db)):
+async def update_transaction(transaction_id: int, transaction: schemas.TransactionUpdate, db: AsyncSession = Depends(get_async_db)):
     """Modification"""
-    db_transaction = services_transactions.get_transaction(db, transaction_id)
+    db_transaction = await db.run_sync(services_transactions.get_transaction, transaction_id)
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction introuvable")
     
-    return services_transactions.update_transaction(db, db_transaction, transaction)
+    return await db.run_sync(services_transactions.update_transaction, db_transaction, transaction)
 
 @router.delete("/{transaction_id}")
-def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
     """Suppression"""
-    db_transaction = services_transactions.get_transaction(db, transaction_id)
+    db_transaction = await db.run_sync(services_transactions.get_transaction, transaction_id)
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction introuvable")
     
-    services_transactions.delete_transaction(db, db_transaction)
+    await db.run_sync(services_transactions.delete_transaction, db_transaction)
     return {"message": "Transaction supprimée"}
\ No newline at end of file
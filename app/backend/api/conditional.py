@@ -0,0 +1,59 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match) pour les routes de lecture.
+
+L'ETag d'une réponse combine l'URL, les versions des tables dont elle dépend
+(data_versions) et la date du jour (les périodes "current_month"... glissent d'un
+jour à l'autre). Si le client renvoie le même ETag, la dépendance répond 304
+avant que la route ne lance la moindre requête d'agrégat.
+
+Usage :
+    @router.get("/stats", dependencies=[Depends(conditional_get(TRANSACTIONS, CATEGORIES))])
+"""
+
+import hashlib
+from datetime import date, timezone
+from email.utils import format_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.async_database import get_async_read_db
+from ..services import services_versions
+
+
+def _etag(request: Request, versions: dict) -> str:
+    parts = [request.url.path, request.url.query, date.today().isoformat()]
+    parts += [f"{table}:{version}" for table, (version, _) in sorted(versions.items())]
+    return 'W/"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {c.strip() for c in header.split(",")}
+    # Comparaison faible : W/"x" et "x" désignent la même représentation
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+
+def conditional_get(*tables: str, get_session=get_async_read_db):
+    """
+    Dépendance : 304 si le client a déjà la version courante, sinon pose
+    ETag / Last-Modified sur la réponse.
+    get_session doit être la même dépendance de session que la route (session partagée).
+    """
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_session)):
+        versions = await db.run_sync(services_versions.get_versions, tables)
+        etag = _etag(request, versions)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        modified = [updated for _, updated in versions.values() if updated is not None]
+        if modified:
+            # updated_at est stocké en UTC naïf
+            headers["Last-Modified"] = format_datetime(max(modified).replace(tzinfo=timezone.utc), usegmt=True)
+
+        if _matches(request, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
@@ -0,0 +1,249 @@
+# metrics.py
+"""
+Métriques Prometheus, exposées sur /api/metrics (format texte).
+
+- zadeet_http_request_duration_seconds{method, route, status} : histogramme par
+  gabarit de route (/api/transactions/{transaction_id}, pas l'URL réelle) ;
+- zadeet_http_requests_in_flight : requêtes en cours ;
+- zadeet_listing_rows{route, format} : lignes renvoyées par les listings ;
+- zadeet_db_pool_connections{engine, state} et compteurs d'attente / timeouts ;
+- zadeet_cache_requests_total{function, result} : hits / misses du cache des
+  agrégats (taux de succès côté Prometheus :
+  sum(rate(..{result="hit"}[5m])) / sum(rate(..[5m]))).
+
+Chemin critique : un middleware ASGI pur (pas de BaseHTTPMiddleware), trois
+opérations par requête. L'état des pools et du cache, déjà tenu par pool.py et
+services_cache, est recopié toutes les METRICS_REFRESH_SECONDS par un thread,
+lancé et arrêté avec le serveur (start / stop, appelés par le lifespan de main.py).
+
+Plusieurs workers uvicorn : avec PROMETHEUS_MULTIPROC_DIR (répertoire vide au
+démarrage), chaque processus écrit ses valeurs dans ce répertoire et /api/metrics
+les agrège, quel que soit le worker qui répond. Sans la variable : registre du
+processus seul.
+prometheus_client est optionnel : sans lui, /api/metrics répond 503.
+"""
+
+import glob
+import os
+import re
+import threading
+import time
+
+from fastapi import HTTPException, Response
+
+from ..db.async_database import async_engine, async_read_engine
+from ..db.database import engine, read_engine
+from ..services.services_cache import result_cache
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, multiprocess
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    prometheus_client = None
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+REFRESH_SECONDS = float(os.getenv("METRICS_REFRESH_SECONDS", "5"))
+ENABLED = prometheus_client is not None
+
+ROW_BUCKETS = (0, 1, 10, 25, 50, 100, 200, 500, 1000, 5000, 10000, 50000, 100000)
+
+if ENABLED:
+    REQUEST_DURATION = Histogram(
+        "zadeet_http_request_duration_seconds", "Durée des requêtes HTTP",
+        ("method", "route", "status"),
+    )
+    IN_FLIGHT = Gauge(
+        "zadeet_http_requests_in_flight", "Requêtes HTTP en cours",
+        multiprocess_mode="livesum",
+    )
+    LISTING_ROWS = Histogram(
+        "zadeet_listing_rows", "Lignes renvoyées par les routes de listing",
+        ("route", "format"), buckets=ROW_BUCKETS,
+    )
+    POOL_CONNECTIONS = Gauge(
+        "zadeet_db_pool_connections", "Connexions du pool par état",
+        ("engine", "state"), multiprocess_mode="livesum",
+    )
+    POOL_CHECKOUTS = Counter("zadeet_db_pool_checkouts_total", "Connexions empruntées au pool", ("engine",))
+    POOL_TIMEOUTS = Counter("zadeet_db_pool_timeouts_total", "Attentes de connexion en timeout", ("engine",))
+    POOL_WAIT = Counter("zadeet_db_pool_wait_seconds_total", "Temps cumulé d'attente d'une connexion", ("engine",))
+    CACHE_REQUESTS = Counter(
+        "zadeet_cache_requests_total", "Appels au cache des agrégats", ("function", "result"),
+    )
+    CACHE_ENTRIES = Gauge(
+        "zadeet_cache_entries", "Entrées du cache des agrégats", multiprocess_mode="livesum",
+    )
+
+
+def observe_rows(route: str, count: int, format: str = "json"):
+    """
+    Taille d'une réponse de listing (no-op sans prometheus_client).
+    """
+    if ENABLED:
+        LISTING_ROWS.labels(route, format).observe(count)
+
+
+# -----------------------------------------------------
+# MIDDLEWARE ASGI
+# -----------------------------------------------------
+class MetricsMiddleware:
+    """
+    Durée jusqu'au dernier octet envoyé (flux ndjson compris), par gabarit de route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # Le routeur complète le scope avec la route trouvée ; sinon une seule
+            # série pour toutes les URL inconnues (cardinalité bornée)
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"], route.path if route is not None else "unmatched", status
+            ).observe(time.perf_counter() - start)
+
+
+# -----------------------------------------------------
+# ÉTAT DES POOLS ET DU CACHE (thread de rafraîchissement)
+# -----------------------------------------------------
+_last_totals: dict[tuple, float] = {}
+_refresh_lock = threading.Lock()
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def _inc_to(counter, labels: tuple, total: float):
+    # Les compteurs de pool.py / services_cache sont cumulés : on n'ajoute que l'écart
+    previous = _last_totals.get((counter, labels), 0.0)
+    child = counter.labels(*labels)  # série créée à 0 : rate() exploitable dès le départ
+    if total > previous:
+        child.inc(total - previous)
+    _last_totals[(counter, labels)] = total
+
+
+def _engines() -> dict:
+    engines = {"sync": engine, "async": async_engine.sync_engine}
+    if read_engine is not engine:
+        engines["read_sync"] = read_engine
+        engines["read_async"] = async_read_engine.sync_engine
+    return engines
+
+
+def refresh():
+    with _refresh_lock:
+        _refresh()
+
+
+def _refresh():
+    for name, e in _engines().items():
+        pool = e.pool
+        if hasattr(pool, "checkedout"):
+            POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+            POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+            POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+        stats = getattr(pool, "wait_stats", None)
+        if stats is not None:
+            _inc_to(POOL_CHECKOUTS, (name,), stats.checkouts)
+            _inc_to(POOL_TIMEOUTS, (name,), stats.timeouts)
+            _inc_to(POOL_WAIT, (name,), stats.total_wait)
+
+    snapshot = result_cache.snapshot()
+    CACHE_ENTRIES.set(snapshot["size"])
+    for function, counters in snapshot["functions"].items():
+        _inc_to(CACHE_REQUESTS, (function, "hit"), counters["hits"])
+        _inc_to(CACHE_REQUESTS, (function, "miss"), counters["misses"])
+
+
+def _refresh_loop():
+    while not _stop.wait(REFRESH_SECONDS):
+        try:
+            refresh()
+        except Exception:  # le thread ne doit pas mourir sur une erreur passagère
+            pass
+
+
+def _cleanup_dead_workers():
+    """
+    Retire les jauges "live" des workers morts (redémarrage d'un worker uvicorn) :
+    sans cela leurs dernières valeurs resteraient dans les sommes.
+    """
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, "gauge_live*_*.db")):
+        match = re.search(r"_(\d+)\.db$", path)
+        if match is None:
+            continue
+        pid = int(match.group(1))
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+        except PermissionError:
+            pass
+
+
+def install(app):
+    """
+    Branche le middleware (si prometheus_client est installé). Aucun thread ici : voir start().
+    """
+    if not ENABLED:
+        return
+    app.add_middleware(MetricsMiddleware)
+
+
+def start():
+    """
+    Lance le thread de rafraîchissement (une seule fois ; au démarrage du serveur).
+    """
+    global _thread
+    if not ENABLED or _thread is not None:
+        return
+    if MULTIPROC_DIR:
+        _cleanup_dead_workers()
+    _stop.clear()
+    _thread = threading.Thread(target=_refresh_loop, name="metrics-refresh", daemon=True)
+    _thread.start()
+
+
+def stop():
+    """
+    Arrête le thread de rafraîchissement (arrêt du serveur).
+    """
+    global _thread
+    if _thread is None:
+        return
+    _stop.set()
+    _thread.join()
+    _thread = None
+
+
+def render() -> Response:
+    """
+    Corps de /api/metrics, agrégé sur tous les workers en mode multiprocessus.
+    """
+    if not ENABLED:
+        raise HTTPException(status_code=503, detail="prometheus_client n'est pas installé")
+    # Valeurs fraîches pour le processus qui répond
+    refresh()
+    if MULTIPROC_DIR:
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(prometheus_client.generate_latest(registry), media_type=prometheus_client.CONTENT_TYPE_LATEST)
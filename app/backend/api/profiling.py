@@ -0,0 +1,145 @@
+# profiling.py
+"""
+Profilage par requête HTTP (désactivé par défaut).
+
+Réglages (environnement) :
+    PROFILING            active le middleware                           (défaut false)
+    PROFILING_SLOW_MS    seuil de log d'une requête lente, en ms         (défaut 500)
+    PROFILING_N_PLUS_ONE même requête SQL répétée plus de K fois => N+1  (défaut 10)
+
+Les événements moteur (tous les moteurs : primaire, réplica, async) comptent
+les requêtes SQL et cumulent leur durée dans le profil de la requête HTTP en
+cours, porté par une ContextVar : il suit run_sync, le threadpool des routes
+synchrones et les tâches d'asyncio.gather (sections de /stats, dont les durées
+en base s'additionnent alors qu'elles se chevauchent).
+La réponse reçoit un en-tête Server-Timing (db, serialize, total), ajouté à
+celui que la route a éventuellement posé. "serialize" couvre fast_json et
+l'encodage JSON par défaut (ProfiledJSONResponse), pas la validation
+response_model faite par FastAPI.
+Limite : le corps d'une StreamingResponse (format=ndjson) est produit après
+la sortie du middleware, ses requêtes ne sont pas comptées.
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from sqlalchemy import event
+
+from ..db import async_database, database
+
+PROFILING_ENABLED = os.getenv("PROFILING", "false").strip().lower() in ("1", "true", "yes", "on")
+SLOW_REQUEST_MS = float(os.getenv("PROFILING_SLOW_MS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("PROFILING_N_PLUS_ONE", "10"))
+
+logger = logging.getLogger("zadeet.profiling")
+
+
+@dataclass
+class RequestProfile:
+    queries: int = 0
+    db_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+
+
+@contextmanager
+def serializing():
+    """
+    Compte le bloc dans le temps "serialize" de la requête en cours.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serialize_seconds += time.perf_counter() - start
+
+
+# -----------------------------------------------------
+# ÉVÉNEMENTS MOTEUR
+# -----------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info["profiling_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    start = conn.info.pop("profiling_start", None)
+    if profile is None or start is None:
+        return
+    profile.db_seconds += time.perf_counter() - start
+    profile.queries += 1
+    profile.statements[statement] += 1
+
+
+def _engines():
+    return {
+        database.engine, database.read_engine,
+        async_database.async_engine.sync_engine, async_database.async_read_engine.sync_engine,
+    }
+
+
+# -----------------------------------------------------
+# MIDDLEWARE
+# -----------------------------------------------------
+def _server_timing(profile: RequestProfile, total: float) -> str:
+    return (
+        f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.queries} queries", '
+        f"serialize;dur={profile.serialize_seconds * 1000:.1f}, "
+        f"total;dur={total * 1000:.1f}"
+    )
+
+
+def _report(request: Request, profile: RequestProfile, total: float):
+    route = f"{request.method} {request.url.path}"
+    if total * 1000 > SLOW_REQUEST_MS:
+        logger.warning(
+            "Requête lente : %s en %.1f ms (%d requêtes SQL, %.1f ms en base, %.1f ms de sérialisation)",
+            route, total * 1000, profile.queries, profile.db_seconds * 1000, profile.serialize_seconds * 1000,
+        )
+    for statement, count in profile.statements.items():
+        if count > N_PLUS_ONE_THRESHOLD:
+            logger.warning("N+1 probable : %s exécute %d fois : %s", route, count, " ".join(statement.split())[:300])
+
+
+async def profile_request(request: Request, call_next):
+    profile = RequestProfile()
+    token = _current.set(profile)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    total = time.perf_counter() - start
+
+    timing = _server_timing(profile, total)
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+    _report(request, profile, total)
+    return response
+
+
+def install(app: FastAPI):
+    """
+    Branche les événements moteur et le middleware si PROFILING est activé.
+    À appeler après les autres middlewares : le profilage les englobe.
+    """
+    if not PROFILING_ENABLED:
+        return
+    for engine in _engines():
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.middleware("http")(profile_request)
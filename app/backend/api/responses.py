@@ -0,0 +1,84 @@
+"""
+Chemin de sérialisation rapide pour les grosses réponses JSON.
+
+Par défaut FastAPI valide le retour contre response_model (Pydantic), le passe
+dans jsonable_encoder puis l'encode avec json : sur un listing de plusieurs
+centaines de lignes, c'est aussi coûteux que la requête elle-même.
+
+Les routes concernées renvoient directement une FastJSONResponse :
+- listes construites par nos services (dicts de types simples) : encodées
+  telles quelles par orjson, sans validation ;
+- structures publiques imbriquées (arbre des catégories) : validées une fois par
+  un TypeAdapter Pydantic v2 puis sérialisées en octets par pydantic-core.
+response_model reste déclaré sur les routes pour la documentation OpenAPI.
+
+orjson est optionnel : sans lui, repli sur le module json standard.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from .profiling import serializing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """
+    Réponse JSON par défaut de l'appli : son encodage compte dans le temps
+    "serialize" du profilage.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with serializing():
+            return super().render(content)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # Contenu déjà encodé (ex : TypeAdapter.dump_json)
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def fast_json(content: Any, response: Response | None = None, adapter: TypeAdapter | None = None) -> FastJSONResponse:
+    """
+    Construit la réponse en court-circuitant response_model / jsonable_encoder.
+    response : la Response injectée dans la route ; ses en-têtes (ETag,
+    Server-Timing...) sont recopiés, FastAPI ne le faisant pas pour une
+    Response renvoyée directement.
+    adapter : si fourni, le contenu est validé puis sérialisé par Pydantic.
+    """
+    with serializing():
+        if adapter is not None:
+            content = adapter.dump_json(adapter.validate_python(content))
+        fast = FastJSONResponse(content)
+
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                fast.headers[name] = value
+    return fast
@@ -0,0 +1,98 @@
+# async_database.py
+"""
+Moteur et sessions asynchrones utilisés par les routes FastAPI.
+
+Une route "async def" qui attend PostgreSQL via asyncpg rend la main à la boucle
+d'événements au lieu d'occuper un des ~40 threads du pool d'anyio : la
+concurrence par pod n'est plus plafonnée par ce pool.
+
+Les lectures chaudes (listing des transactions, sections du dashboard, arbre
+des catégories) ont une variante async des services (suffixe _async) qui
+exécute ses select() par await session.execute. Les écritures restent écrites
+avec une Session synchrone et sont appelées via AsyncSession.run_sync : leurs
+requêtes passent par le driver async, mais le code ORM tourne sur le thread de
+la boucle d'événements.
+Le moteur synchrone de database.py reste disponible pour les scripts
+(init_db.py, seed_db.py, CLI des services).
+
+get_async_read_db sert les routes de lecture : réplica si DATABASE_READ_URL est
+définie et que le client n'est pas épinglé sur le primaire (read_routing.py).
+"""
+
+import os
+
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .database import SQLALCHEMY_DATABASE_URL, SQLALCHEMY_READ_DATABASE_URL
+from . import slow_queries
+from .pool import InstrumentedAsyncQueuePool, install_connect_retry, pool_settings
+from .read_routing import is_pinned_to_primary
+
+# Driver async correspondant au driver synchrone de DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str, explicit: str | None = None) -> str:
+    """
+    postgresql://... -> postgresql+asyncpg://..., sqlite://... -> sqlite+aiosqlite://...
+    explicit (ex : ASYNC_DATABASE_URL), si fournie, est utilisée telle quelle.
+    """
+    if explicit:
+        return explicit
+
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Pas de driver async connu pour : {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# Mêmes réglages de pool que le moteur synchrone (pool distinct)
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL, os.getenv("ASYNC_DATABASE_URL")),
+    poolclass=InstrumentedAsyncQueuePool,
+    **pool_settings(),
+)
+install_connect_retry(async_engine.sync_engine)
+slow_queries.install(async_engine.sync_engine)
+
+# expire_on_commit=False : les objets renvoyés après un commit restent lisibles
+# sans relancer de requête (un chargement implicite hors run_sync échouerait)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+if SQLALCHEMY_READ_DATABASE_URL:
+    async_read_engine = create_async_engine(
+        async_database_url(SQLALCHEMY_READ_DATABASE_URL, os.getenv("ASYNC_DATABASE_READ_URL")),
+        poolclass=InstrumentedAsyncQueuePool,
+        **pool_settings(),
+    )
+    install_connect_retry(async_read_engine.sync_engine)
+    slow_queries.install(async_read_engine.sync_engine)
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, class_=AsyncSession, expire_on_commit=False, info={"read_only": True}
+    )
+else:
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_session_factory(request: Request) -> async_sessionmaker:
+    """
+    Usine de sessions de lecture pour cette requête (primaire si le client est épinglé).
+    """
+    return AsyncSessionLocal if is_pinned_to_primary(request) else AsyncReadSessionLocal
+
+
+async def get_async_read_db(request: Request):
+    async with read_session_factory(request)() as db:
+        yield db
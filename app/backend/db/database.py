@@ -4,6 +4,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
+from . import slow_queries
+from .pool import InstrumentedQueuePool, install_connect_retry, pool_settings
+
 # 1. Configuration de l'URL de connexion
 # On récupère la variable "DATABASE_URL" définie dans le docker-compose.
 # Si elle n'existe pas (ex: test hors docker), on utilise une valeur par défaut locale.
@@ -13,12 +16,39 @@ SQLALCHEMY_DATABASE_URL = os.getenv(
 # 2. Création du Moteur (Engine)
 # Contrairement à SQLite, PostgreSQL gère le multi-thread nativement.
 # Nous n'avons donc plus besoin de l'option connect_args={"check_same_thread": False}.
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Pool configurable par variables d'environnement (voir pool.py) et instrumenté.
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_settings())
+# Aucune connexion à la création : la première est ouverte (avec nouvelles
+# tentatives) à la première requête. Journal des requêtes lentes : slow_queries.py
+install_connect_retry(engine)
+slow_queries.install(engine)
 
 # 3. Création de la Session
 # C'est l'usine qui va fabriquer des sessions de connexion pour chaque requête.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 3 bis. Réplica de lecture optionnel (voir read_routing.py)
+# Sans DATABASE_READ_URL, les sessions de lecture utilisent le primaire.
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL")
+
+if SQLALCHEMY_READ_DATABASE_URL:
+    read_engine = create_engine(SQLALCHEMY_READ_DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_settings())
+    install_connect_retry(read_engine)
+    slow_queries.install(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, info={"read_only": True})
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
 # 4. Base déclarative
 # Toutes tes tables (dans models.py) hériteront de cette classe Base.
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+# 5. Dépendance FastAPI commune à toutes les routes synchrones
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
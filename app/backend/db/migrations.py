@@ -0,0 +1,216 @@
+# migrations.py
+"""
+Migrations versionnées du schéma, appliquées explicitement (jamais à l'import
+de l'appli) :
+
+    python -m app.backend.db.migrations upgrade [--wait 60]
+    python -m app.backend.db.migrations status
+
+Chaque migration appliquée est inscrite dans la table schema_migrations.
+upgrade applique les migrations manquantes dans une seule transaction ; sur
+PostgreSQL un verrou consultatif sérialise les exécutions concurrentes
+(plusieurs pods qui démarrent en même temps).
+/api/ready répond 503 tant que la base n'est pas à la dernière version.
+
+Ajouter une migration : écrire une fonction (connexion) et l'ajouter à la fin
+de MIGRATIONS, avec le numéro suivant. Ne jamais modifier une migration déjà
+déployée.
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from sqlalchemy import (
+    DDL, Column, Date, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, event, inspect,
+    select, text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.backend.services import services_rollups
+from . import models
+
+# Table de suivi hors de models.Base : drop_all ne la touche pas
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Clé arbitraire du verrou consultatif (pg_advisory_xact_lock)
+ADVISORY_LOCK_KEY = 742_001
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+# -----------------------------------------------------
+# MIGRATIONS
+# -----------------------------------------------------
+# Schéma de la version 1, figé : une évolution de models.py ne doit pas changer
+# ce que crée cette migration (elle passe par une nouvelle migration)
+v1_metadata = MetaData()
+v1_categories = Table(
+    "categories", v1_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, index=True),
+    Column("type", String),
+    Column("parent_id", Integer, ForeignKey("categories.id"), nullable=True),
+)
+v1_transactions = Table(
+    "transactions", v1_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("amount", Float),
+    Column("label", String),
+    Column("date", DateTime),
+    Column("category_id", Integer, ForeignKey("categories.id")),
+    Index("ix_transactions_date_category_id", "date", "category_id"),
+    Index("ix_transactions_category_id_date", "category_id", "date"),
+    Index(
+        "ix_transactions_label_trgm", "label",
+        postgresql_using="gin", postgresql_ops={"label": "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql"),
+)
+Table(
+    "monthly_category_totals", v1_metadata,
+    Column("month", Date, primary_key=True),
+    Column("category_id", Integer, primary_key=True),
+    Column("total", Float, nullable=False),
+    Column("count", Integer, nullable=False),
+)
+Table(
+    "balance_snapshots", v1_metadata,
+    Column("month", Date, primary_key=True),
+    Column("closing_balance", Float, nullable=False),
+    Column("computed_at", DateTime),
+)
+Table(
+    "data_versions", v1_metadata,
+    Column("table_name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("updated_at", DateTime),
+)
+event.listen(
+    v1_metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def _initial_schema(conn: Connection):
+    # Bases créées avant les migrations : create_all saute les tables
+    # existantes, on complète les index manquants
+    v1_metadata.create_all(bind=conn)
+    for table in (v1_categories, v1_transactions):
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _backfill_monthly_totals(conn: Connection):
+    # Bases antérieures à l'agrégat : monthly_category_totals vient d'être créée
+    # vide alors que transactions a déjà des lignes. La session rejoint la
+    # transaction de upgrade (son commit ne valide pas la transaction externe)
+    with Session(bind=conn) as db:
+        services_rollups.rebuild(db)
+
+
+MIGRATIONS = (
+    Migration(1, "schéma initial", _initial_schema),
+    Migration(2, "remplissage de l'agrégat mensuel", _backfill_monthly_totals),
+)
+
+HEAD = MIGRATIONS[-1].version
+
+
+# -----------------------------------------------------
+# ÉTAT
+# -----------------------------------------------------
+def applied(conn: Connection) -> set[int]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(conn: Connection) -> list[Migration]:
+    done = applied(conn)
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+# -----------------------------------------------------
+# APPLICATION
+# -----------------------------------------------------
+def upgrade(engine: Engine) -> list[Migration]:
+    """
+    Applique les migrations manquantes.
+    return: les migrations appliquées
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        migration_metadata.create_all(bind=conn)
+        todo = pending(conn)
+        for migration in todo:
+            migration.apply(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.now(),
+            ))
+    return todo
+
+
+def reset(engine: Engine) -> list[Migration]:
+    """
+    Supprime toutes les tables puis réapplique toutes les migrations (données perdues).
+    """
+    models.Base.metadata.drop_all(bind=engine)
+    migration_metadata.drop_all(bind=engine)
+    return upgrade(engine)
+
+
+def wait_for_database(engine: Engine, timeout: float):
+    """
+    Attend que la base accepte les connexions (conteneur init, base qui démarre).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return
+        except Exception:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(1)
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="Migrations du schéma ZADEET")
+    parser.add_argument("command", choices=("upgrade", "status"))
+    parser.add_argument("--wait", type=float, default=0, help="attente max de la base, en s")
+    args = parser.parse_args()
+
+    if args.wait:
+        wait_for_database(engine, args.wait)
+
+    if args.command == "upgrade":
+        done = upgrade(engine)
+        for migration in done:
+            print(f"Appliquée : {migration.version} - {migration.name}")
+        print(f"Schéma à jour (version {HEAD}).")
+    else:
+        with engine.connect() as conn:
+            missing = pending(conn)
+        print(f"Version cible : {HEAD}")
+        for migration in missing:
+            print(f"En attente : {migration.version} - {migration.name}")
+        if missing:
+            raise SystemExit(1)
+        print("Schéma à jour.")
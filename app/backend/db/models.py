@@ -8,7 +8,7 @@ permet de ne pas exposer la bdd directement via l'API.
 """
 
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Index, DDL, event
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
 # @TODO: ajouter le modèle pour les plafonds
@@ -39,4 +39,59 @@ class Transaction(Base):
     # Lien vers la catégorie (on lie souvent à la sous-catégorie directement)
     category_id = Column(Integer, ForeignKey("categories.id"))
     
-    category = relationship("Category", back_populates="transactions")
\ No newline at end of file
+    category = relationship("Category", back_populates="transactions")
+
+    # Index composites : filtres de période (date d'abord) et
+    # filtres par catégorie sur une période (category_id d'abord)
+    __table_args__ = (
+        Index("ix_transactions_date_category_id", "date", "category_id"),
+        Index("ix_transactions_category_id_date", "category_id", "date"),
+        # Recherche sur le libellé (PostgreSQL) : index trigrammes pour ILIKE '%x%'
+        # et les correspondances approchées (pg_trgm). Ignoré sur SQLite.
+        Index(
+            "ix_transactions_label_trgm",
+            "label",
+            postgresql_using="gin",
+            postgresql_ops={"label": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+# L'index trigrammes a besoin de l'extension pg_trgm
+PG_TRGM_EXTENSION = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+event.listen(Base.metadata, "before_create", PG_TRGM_EXTENSION)
+
+class MonthlyCategoryTotal(Base):
+    """
+    Agrégat (catégorie x mois) maintenu à chaque écriture de transaction.
+    Le dashboard lit cette table au lieu de rescanner "transactions".
+    Table dérivée : reconstructible via services_rollups.rebuild.
+    """
+    __tablename__ = "monthly_category_totals"
+
+    month = Column(Date, primary_key=True) # 1er jour du mois
+    category_id = Column(Integer, primary_key=True)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+class BalanceSnapshot(Base):
+    """
+    Solde de clôture d'un mois terminé (toutes transactions jusqu'à la fin du mois).
+    Le solde courant = dernier snapshot + transactions postérieures.
+    Une écriture antidatée supprime les snapshots à partir du mois touché.
+    """
+    __tablename__ = "balance_snapshots"
+
+    month = Column(Date, primary_key=True) # 1er jour du mois clôturé
+    closing_balance = Column(Float, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+class DataVersion(Base):
+    """
+    Compteur de version par table, incrémenté dans la transaction de chaque écriture.
+    Sert à construire les ETag des routes de lecture (une lecture par clé primaire).
+    """
+    __tablename__ = "data_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
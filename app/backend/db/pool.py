@@ -0,0 +1,160 @@
+# pool.py
+"""
+Réglages et instrumentation des pools de connexions.
+
+Les réglages viennent de l'environnement (mêmes valeurs pour le moteur sync et
+le moteur async, chacun ayant son propre pool) :
+    DB_POOL_SIZE       connexions gardées ouvertes            (défaut 5)
+    DB_MAX_OVERFLOW    connexions supplémentaires en pic      (défaut 10)
+    DB_POOL_TIMEOUT    attente max d'une connexion, en s      (défaut 30)
+    DB_POOL_RECYCLE    durée de vie max d'une connexion, en s (défaut 1800, -1 = jamais)
+    DB_POOL_PRE_PING   teste la connexion avant usage         (défaut true)
+    DB_CONNECT_RETRIES nouvelles tentatives d'ouverture        (défaut 3)
+    DB_CONNECT_BACKOFF attente avant la 1re tentative, en s,
+                       doublée ensuite (max 5 s)              (défaut 0.5)
+
+Les pools instrumentés mesurent le temps passé à attendre une connexion et
+comptent les timeouts : une saturation du pool devient visible sur
+/internal/pool au lieu de n'apparaître qu'en erreurs 500.
+
+Les moteurs ne se connectent qu'à la première requête : l'import de l'appli ne
+touche pas la base. L'ouverture d'une connexion est retentée quelques fois
+(base qui démarre, bascule du primaire) avant de remonter l'erreur.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import await_only
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_settings() -> dict:
+    """
+    Arguments de pool pour create_engine / create_async_engine.
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+class PoolWaitStats:
+    """
+    Cumul des attentes de connexion d'un pool (thread-safe).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if timed_out:
+                self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.total_wait * 1000, 2),
+                "wait_avg_ms": round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.max_wait * 1000, 2),
+            }
+
+
+class _InstrumentedMixin:
+    """
+    Chronomètre _do_get : le temps d'obtention d'une connexion, file d'attente incluse.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+MAX_CONNECT_BACKOFF = 5.0
+
+
+def install_connect_retry(engine):
+    """
+    Ouverture de connexion avec nouvelles tentatives bornées (moteur async : engine.sync_engine).
+    """
+    retries = int(os.getenv("DB_CONNECT_RETRIES", "3"))
+    backoff = float(os.getenv("DB_CONNECT_BACKOFF", "0.5"))
+
+    @event.listens_for(engine, "do_connect")
+    def connect_with_retry(dialect, conn_rec, cargs, cparams):
+        delay = backoff
+        for attempt in range(retries + 1):
+            try:
+                return dialect.connect(*cargs, **cparams)
+            except (dialect.loaded_dbapi.Error, OSError):
+                if attempt == retries:
+                    raise
+            # Driver async : on est dans le greenlet de run_sync, on rend la main à la boucle
+            if dialect.is_async:
+                await_only(asyncio.sleep(delay))
+            else:
+                time.sleep(delay)
+            delay = min(delay * 2, MAX_CONNECT_BACKOFF)
+
+
+def pool_status(pool) -> dict:
+    """
+    État courant d'un pool : connexions empruntées, libres, en débordement, attentes.
+    """
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+
+    status = {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout_s": pool.timeout(),
+    }
+    stats = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
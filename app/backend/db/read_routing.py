@@ -0,0 +1,56 @@
+# read_routing.py
+"""
+Routage des lectures vers un réplica (DATABASE_READ_URL, optionnelle).
+
+Les routes de lecture lourdes (dashboard, listing des transactions) prennent une
+session "lecture" ; sans DATABASE_READ_URL elle pointe simplement sur le primaire.
+Une session liée au réplica porte session.info["read_only"] = True : les services
+n'y persistent rien (ex : snapshots de solde) et ne mettent pas en cache des
+données qui pourraient être en retard.
+
+Lecture de ses propres écritures : après une écriture réussie, le middleware pose
+un cookie qui épingle le client sur le primaire pendant READ_YOUR_WRITES_SECONDS,
+le temps que le réplica rattrape son retard.
+"""
+
+import os
+import time
+
+from fastapi import Request
+
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_PIN_COOKIE = "zadeet_primary_until"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """
+    True si le client a écrit il y a moins de READ_YOUR_WRITES_SECONDS.
+    """
+    value = request.cookies.get(PRIMARY_PIN_COOKIE)
+    try:
+        return value is not None and float(value) > time.time()
+    except ValueError:
+        return False
+
+
+async def read_your_writes(request: Request, call_next):
+    """
+    Middleware HTTP : épingle le client sur le primaire après une écriture réussie.
+    """
+    response = await call_next(request)
+    if (
+        READ_YOUR_WRITES_SECONDS > 0
+        and request.method not in SAFE_METHODS
+        and request.url.path.startswith("/api/")
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(time.time() + READ_YOUR_WRITES_SECONDS),
+            max_age=READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
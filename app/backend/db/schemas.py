@@ -7,8 +7,10 @@ de données et d’assurer une validation automatique des données.
 """
 
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, model_validator
+from typing import Optional, List, Literal
+
+from app.backend.services.services_periods import PERIODS
 
 
 
@@ -45,8 +47,37 @@ class Category(CategoryBase):
     subcategories: List["Category"] = [] 
     transactions: List["Transaction"] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategoryNode(CategoryBase):
+    """
+    Catégorie allégée pour les listes et menus déroulants :
+    pas de transactions, la taille ne dépend que du nombre de catégories.
+    """
+    id: int
+    subcategories: List["CategoryNode"] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategoryTreeNode(CategoryBase):
+    """
+    Noeud de l'arbre des catégories (racines -> enfants).
+    Les compteurs ne sont remplis que si with_totals=true.
+    """
+    id: int
+    children: List["CategoryTreeNode"] = []
+    transaction_count: Optional[int] = None
+    total: Optional[float] = None
+
+
+class CategoryDetail(BaseModel):
+    """
+    Une catégorie et, si include=transactions, une page de ses transactions.
+    """
+    category: CategoryNode
+    transactions: Optional[dict] = None
 
 
 class TransactionBase(BaseModel):
@@ -80,5 +111,73 @@ class Transaction(TransactionBase):
     id: int
     date: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TransactionItem(BaseModel):
+    """
+    Ligne du listing des transactions (catégorie résolue via l'index).
+    """
+    id: int
+    label: str | None
+    amount: float | None
+    date: str  # dd/mm/YYYY
+    category_name: str
+    parent_name: str
+    category_type: str
+    category_id: int | None
+    date_raw: datetime
+
+
+class TransactionPage(BaseModel):
+    """
+    Une page du listing ; next_cursor à repasser pour la page suivante.
+    """
+    items: List[TransactionItem]
+    next_cursor: Optional[str] = None
+
+
+class CategoryTotal(BaseModel):
+    category_id: int
+    category_name: str
+    category_type: str
+    total: float
+
+
+class TransactionFilter(BaseModel):
+    """
+    Sélection de transactions par filtre (mêmes critères que le listing).
+    Une période inconnue est refusée (422) au lieu de ne rien filtrer, et viser
+    toute la table demande all=true explicitement.
+    """
+    category_id: Optional[int] = None
+    period: Optional[Literal[PERIODS]] = None
+    all: bool = False
+
+    @model_validator(mode="after")
+    def _check_scope(self):
+        narrowed = self.category_id is not None or self.period not in (None, "all")
+        if not narrowed and not self.all:
+            raise ValueError("Filtre sans category_id ni period : all=true requis pour viser toutes les transactions")
+        return self
+
+
+class TransactionBatchOperation(BaseModel):
+    """
+    Une opération du lot : modification (patch) ou suppression d'une liste d'ids.
+    """
+    op: Literal["update", "delete"]
+    ids: List[int]
+    patch: Optional[TransactionUpdate] = None
+
+
+class TransactionBatch(BaseModel):
+    """
+    Modifications en masse : une liste d'opérations,
+    ou bien un filtre + un patch (ou delete=true).
+    """
+    operations: List[TransactionBatchOperation] = []
+    filter: Optional[TransactionFilter] = None
+    patch: Optional[TransactionUpdate] = None
+    delete: bool = False
+
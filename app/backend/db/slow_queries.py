@@ -0,0 +1,315 @@
+# slow_queries.py
+"""
+Journal des requêtes SQL lentes, en mémoire (ring buffer par processus).
+
+Réglages (environnement) :
+    SLOW_QUERY_MS             seuil d'enregistrement, en ms (-1 = désactivé) (défaut 200)
+    SLOW_QUERY_BUFFER         nombre d'entrées gardées                    (défaut 200)
+    SLOW_QUERY_EXPLAIN_RATE   part des SELECT lents ré-exécutés avec
+                              EXPLAIN (ANALYZE, BUFFERS), PostgreSQL      (défaut 0.1)
+    SLOW_QUERY_EXPLAIN_COOLDOWN  délai min entre deux plans d'une même
+                              requête, en s                               (défaut 300)
+    SLOW_QUERY_LOG_PARAMS     garder les valeurs des paramètres (sinon
+                              seulement leur type : montants, libellés...) (défaut false)
+
+Chaque entrée garde la requête, ses paramètres, la durée et la fonction de
+service appelante (ex : services_accueil.get_category_pie_stats), retrouvée dans
+la pile d'appels, uniquement pour les requêtes lentes.
+EXPLAIN ANALYZE ré-exécute la requête : il est échantillonné, réservé aux SELECT
+et jamais lancé sur le chemin de la requête HTTP. La requête (avec ses vrais
+paramètres, jamais journalisés) est confiée à un thread de fond qui la rejoue
+sur sa propre connexion (psycopg2, hors des pools), dans une transaction
+annulée ensuite ; le plan (lignes réelles, temps par nœud, buffers) est ajouté
+à l'entrée dès qu'il est prêt ("plan": "en attente" jusque-là). File bornée
+(EXPLAIN_QUEUE_SIZE) : au-delà, le plan est abandonné. Le thread est lancé et
+arrêté avec le serveur (start / stop, lifespan de main.py).
+Consultable sur /internal/slow-queries.
+"""
+
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import NullPool
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+EXPLAIN_COOLDOWN = float(os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN", "300"))
+LOG_PARAMS = os.getenv("SLOW_QUERY_LOG_PARAMS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+SERVICES_PACKAGE = "app.backend.services."
+# Décorateurs / utilitaires qui enveloppent les vrais services
+CALLER_SKIP = ("app.backend.services.services_cache",)
+MAX_PARAM_LENGTH = 200
+MAX_PARAM_SETS = 5
+EXPLAIN_QUEUE_SIZE = 16
+PENDING_PLAN = "en attente"
+
+
+class SlowQueryLog:
+    """
+    Les N dernières requêtes lentes (thread-safe).
+    """
+
+    def __init__(self, maxsize: int):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=maxsize)
+        self._last_explain: dict[str, float] = {}
+        self.recorded = 0
+
+    def add(self, entry: dict):
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+
+    def set_plan(self, entry: dict, plan: list[str] | str):
+        with self._lock:
+            entry["plan"] = plan
+
+    def should_explain(self, statement: str) -> bool:
+        if EXPLAIN_RATE <= 0 or random.random() >= EXPLAIN_RATE:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explain.get(statement, float("-inf")) < EXPLAIN_COOLDOWN:
+                return False
+            self._last_explain[statement] = now
+            return True
+
+    def snapshot(self, limit: int | None = None) -> dict:
+        with self._lock:
+            # Copies : le thread des EXPLAIN complète les entrées après coup
+            entries = [dict(e) for e in self._entries]
+            recorded = self.recorded
+        entries.reverse()  # plus récentes d'abord
+        return {
+            "threshold_ms": SLOW_QUERY_MS,
+            "explain_rate": EXPLAIN_RATE,
+            "log_params": LOG_PARAMS,
+            "recorded": recorded,
+            "queries": entries[:limit] if limit else entries,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_explain.clear()
+            self.recorded = 0
+
+
+slow_query_log = SlowQueryLog(BUFFER_SIZE)
+
+
+# -----------------------------------------------------
+# CAPTURE
+# -----------------------------------------------------
+def _short(value):
+    if not LOG_PARAMS:
+        # Données personnelles (libellés, montants) : seulement le type
+        return None if value is None else f"<{type(value).__name__}>"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + "..."
+
+
+def _parameters(parameters, executemany: bool):
+    if executemany:
+        sets = list(parameters)
+        return {"executemany": len(sets), "first": [_parameters(p, False) for p in sets[:MAX_PARAM_SETS]]}
+    if isinstance(parameters, dict):
+        return {key: _short(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_short(value) for value in parameters]
+    return _short(parameters)
+
+
+def _callers() -> list[str]:
+    """
+    Fonctions de services dans la pile, de l'appelant le plus externe au plus interne.
+    """
+    callers = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(SERVICES_PACKAGE) and module not in CALLER_SKIP:
+            callers.append(f"{module[len(SERVICES_PACKAGE):]}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    callers.reverse()
+    return callers
+
+
+def _verb(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else ""
+
+
+# -----------------------------------------------------
+# EXPLAIN (ANALYZE, BUFFERS) EN TÂCHE DE FOND
+# -----------------------------------------------------
+class ExplainJob(NamedTuple):
+    entry: dict
+    url: URL
+    statement: str
+    parameters: object
+
+
+_jobs: queue.Queue = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+_explain_engines: dict[str, Engine] = {}
+
+_DOLLAR_PARAM = re.compile(r"\$(\d+)")
+
+
+def _to_pyformat(statement: str, parameters, paramstyle: str) -> tuple[str, object]:
+    """
+    Requête du moteur async (asyncpg : $1, $2...) réécrite pour psycopg2 (%s).
+    """
+    if paramstyle != "numeric_dollar":
+        return statement, parameters
+    positions = [int(n) - 1 for n in _DOLLAR_PARAM.findall(statement)]
+    statement = _DOLLAR_PARAM.sub("%s", statement.replace("%", "%%"))
+    return statement, tuple(parameters[i] for i in positions)
+
+
+def _explain_engine(url: URL) -> Engine:
+    key = url.render_as_string(hide_password=False)
+    if key not in _explain_engines:
+        _explain_engines[key] = create_engine(url.set(drivername="postgresql+psycopg2"), poolclass=NullPool)
+    return _explain_engines[key]
+
+
+def _run_explain(job: ExplainJob) -> list[str] | str:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) sur une connexion dédiée, transaction annulée ensuite.
+    """
+    try:
+        connection = _explain_engine(job.url).raw_connection()
+    except Exception as e:
+        return f"EXPLAIN impossible : {e}"
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {job.statement}", job.parameters)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        return f"EXPLAIN impossible : {e}"
+    finally:
+        try:
+            connection.rollback()
+        finally:
+            connection.close()
+
+
+def _explain_loop():
+    while not _stop.is_set():
+        try:
+            job = _jobs.get(timeout=1)
+        except queue.Empty:
+            continue
+        if job is None:  # réveil par stop()
+            break
+        slow_query_log.set_plan(job.entry, _run_explain(job))
+
+
+def _submit_explain(entry: dict, conn, statement: str, parameters) -> bool:
+    statement, parameters = _to_pyformat(statement, parameters, conn.dialect.paramstyle)
+    entry["plan"] = PENDING_PLAN
+    try:
+        _jobs.put_nowait(ExplainJob(entry, conn.engine.url, statement, parameters))
+    except queue.Full:
+        entry["plan"] = None
+        return False
+    return True
+
+
+def start():
+    """
+    Lance le thread des EXPLAIN ANALYZE (une seule fois ; au démarrage du serveur).
+    """
+    global _thread
+    if _thread is not None or SLOW_QUERY_MS < 0 or EXPLAIN_RATE <= 0:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_explain_loop, name="slow-query-explain", daemon=True)
+    _thread.start()
+
+
+def stop():
+    """
+    Arrête le thread (arrêt du serveur) ; les plans encore en file sont abandonnés.
+    """
+    global _thread
+    if _thread is None:
+        return
+    _stop.set()
+    try:
+        _jobs.put_nowait(None)
+    except queue.Full:  # thread occupé : il verra _stop au prochain tour
+        pass
+    _thread.join()
+    _thread = None
+    while not _jobs.empty():
+        job = _jobs.get_nowait()
+        if job is not None:
+            slow_query_log.set_plan(job.entry, None)
+    for e in _explain_engines.values():
+        e.dispose()
+    _explain_engines.clear()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["slow_query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("slow_query_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+
+    callers = _callers()
+    entry = {
+        "at": datetime.now().isoformat(timespec="milliseconds"),
+        "duration_ms": round(elapsed_ms, 2),
+        "caller": callers[0] if callers else None,
+        "stack": callers,
+        "database": conn.engine.url.database,
+        "statement": statement,
+        "parameters": _parameters(parameters, executemany),
+        "plan": None,
+    }
+    if (
+        _thread is not None
+        and conn.dialect.name == "postgresql"
+        and not executemany
+        and _verb(statement) in ("SELECT", "WITH")
+        and slow_query_log.should_explain(statement)
+    ):
+        _submit_explain(entry, conn, statement, parameters)
+    slow_query_log.add(entry)
+
+
+def install(engine: Engine):
+    """
+    Branche l'enregistrement sur un moteur (pour un moteur async : engine.sync_engine).
+    """
+    if SLOW_QUERY_MS < 0:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,18 +1,48 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 # On importe les routeurs situés dans backend/api/
-from .api import back_routes_transactions, back_routes_categories, back_routes_acc
+from .api import back_routes_transactions, back_routes_categories, back_routes_acc, back_routes_admin
 
-from .db import models          
-from .db.database import engine 
+from sqlalchemy import text
 
-# Création automatique des tables si elles n'existent pas
-models.Base.metadata.create_all(bind=engine)
+from .db import migrations, slow_queries
+from .db.async_database import async_engine
+from .db.read_routing import read_your_writes
+from .api import metrics, profiling
+from .api.responses import ProfiledJSONResponse
+from .services import services_invalidation
 
-app = FastAPI(title="Zadeet API")
+# L'import ne touche pas la base : le schéma est géré par
+# "python -m app.backend.db.migrations upgrade" (voir migrations.py) et les
+# moteurs ne se connectent qu'à la première requête.
+
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT_SECONDS", "2"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Threads de fond, lancés au démarrage de chaque worker et arrêtés avec lui"""
+    # Invalidation des caches entre processus (thread d'écoute)
+    services_invalidation.start()
+    # Rafraîchissement des métriques de pools et de cache
+    metrics.start()
+    # EXPLAIN ANALYZE échantillonnés des requêtes lentes, hors du chemin des requêtes
+    slow_queries.start()
+    try:
+        yield
+    finally:
+        slow_queries.stop()
+        metrics.stop()
+        services_invalidation.stop()
+
+
+app = FastAPI(title="Zadeet API", default_response_class=ProfiledJSONResponse, lifespan=lifespan)
 
 # --- CONFIGURATION CORS ---
 origins = [
@@ -30,13 +60,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- LECTURE DE SES PROPRES ÉCRITURES (réplica) ---
+app.middleware("http")(read_your_writes)
+
+# --- PROFILAGE PAR REQUÊTE (PROFILING=true) ---
+profiling.install(app)
+
+# --- MÉTRIQUES PROMETHEUS (middleware le plus externe) ---
+metrics.install(app)
+
 # --- INCLUSION DES ROUTES ---
 app.include_router(back_routes_transactions.router)
 app.include_router(back_routes_categories.router)
 app.include_router(back_routes_acc.router)
+app.include_router(back_routes_admin.router)
 
-# --- ROUTE DE VÉRIFICATION ---
+# --- SONDES ---
 @app.get("/api/health")
 def read_root():
+    """Liveness : le processus répond (aucun accès à la base)"""
     return {"status": "online", "message": "API Zadeet fonctionnelle"}
+
+
+_schema_ready = False
+
+
+async def _check_database():
+    global _schema_ready
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        # Une fois à jour, le schéma ne régresse pas : vérifié une seule fois
+        if not _schema_ready:
+            missing = await conn.run_sync(migrations.pending)
+            if missing:
+                return f"migrations en attente : {', '.join(str(m.version) for m in missing)}"
+            _schema_ready = True
+    return None
+
+
+@app.get("/api/ready")
+async def read_ready():
+    """Readiness : base joignable (SELECT 1) et schéma à la dernière version"""
+    try:
+        problem = await asyncio.wait_for(_check_database(), READY_TIMEOUT)
+    except asyncio.TimeoutError:
+        problem = f"base injoignable en {READY_TIMEOUT} s"
+    except Exception as e:
+        problem = f"base injoignable : {e.__class__.__name__}"
+    if problem:
+        return JSONResponse({"status": "unavailable", "detail": problem}, status_code=503)
+    return {"status": "ready"}
+
+@app.get("/api/metrics", include_in_schema=False)
+def read_metrics():
+    """Métriques Prometheus (non relayées par nginx : scrapées sur le pod)"""
+    return metrics.render()
     
@@ -1,27 +1,36 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func
+from sqlalchemy import func, case, select
 from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
 from app.backend.db import models 
-from .services_transactions import *
+from . import services_balance, services_category_index
+from .services_cache import cached
+from .services_versions import CATEGORIES, TRANSACTIONS
+from .services_rollups import month_start
+from .services_periods import apply_date_range, apply_period, is_month_aligned, resolve_period
 from collections import defaultdict
 
-def get_category_totals(db: Session):
-    """
-    Totaux par catégorie (et type) sur tout l'historique.
-    Retourne une liste de dicts.
-    """
-    rows = (
-        db.query(
+# Les agrégats du dashboard lisent l'agrégat mensuel (catégorie x mois)
+# maintenu par services_transactions, et non la table brute.
+Rollup = models.MonthlyCategoryTotal
+
+# Chaque agrégat existe en deux variantes qui partagent requête et mise en forme :
+# fn(db: Session) pour le code synchrone (tests, benchmarks, scripts) et
+# fn_async(db: AsyncSession) pour les routes, exécutée par await db.execute.
+
+def _category_totals_query(amount):
+    return (
+        select(
             models.Category.id.label("category_id"),
             models.Category.name.label("category_name"),
             models.Category.type.label("category_type"),
-            func.sum(models.Transaction.amount).label("total"),
+            func.sum(amount).label("total"),
         )
-        .join(models.Transaction, models.Transaction.category_id == models.Category.id)
         .group_by(models.Category.id, models.Category.name, models.Category.type)
-        .all()
     )
 
+def _category_totals_result(rows):
     return [
         {
             "category_id": r.category_id,
@@ -32,106 +41,187 @@ def get_category_totals(db: Session):
         for r in rows
     ]
 
-def get_parent_category_totals(db: Session):
+CATEGORY_TOTALS_QUERY = _category_totals_query(Rollup.total)\
+    .join(Rollup, Rollup.category_id == models.Category.id)
+
+@cached(TRANSACTIONS, CATEGORIES)
+def get_category_totals(db: Session):
     """
-    Totaux par catégorie parent (ou par catégorie elle‑même si pas de parent).
+    Totaux par catégorie (et type) sur tout l'historique.
+    Retourne une liste de dicts.
     """
-    rows = (
-        db.query(
-            func.coalesce(models.Category.parent_id, models.Category.id).label("group_id"),
-            func.coalesce(models.Category.parent_id, models.Category.id),
-            func.coalesce(models.Category.parent_id, models.Category.id),
-            func.coalesce(models.Category.parent.has().name, models.Category.name),
-        )
-    )
+    return _category_totals_result(db.execute(CATEGORY_TOTALS_QUERY).all())
 
+@cached(TRANSACTIONS, CATEGORIES)
+async def get_category_totals_async(db: AsyncSession):
+    return _category_totals_result((await db.execute(CATEGORY_TOTALS_QUERY)).all())
 
+@cached(TRANSACTIONS, CATEGORIES)
 def get_total_balance(db: Session):
     """
     Calcule le solde total : somme des revenus - somme des dépenses.
+    (dernier solde de clôture mensuel + transactions depuis, cf. services_balance)
     """
-    # Récupère toutes les transactions avec leur catégorie
-    transactions = db.query(models.Transaction).join(models.Category).all()
+    return services_balance.get_total_balance(db)
 
-    total = 0
-    for t in transactions:
-        if t.category.type == "revenu":
-            total += t.amount
-        elif t.category.type == "depense":
-            total -= t.amount
+@cached(TRANSACTIONS, CATEGORIES)
+async def get_total_balance_async(db: AsyncSession):
+    return await services_balance.get_total_balance_async(db)
 
-    return total
+SERIES_GRANULARITIES = ("month", "week", "day")
 
-def get_last_3_months_stats(db: Session):
+def _bucket_expression(db: Session, granularity: str):
     """
-    Prépare les données pour le Graphique 1 (Bâtons) : 3 derniers mois.
-    Retourne : { "labels": ["Oct", "Nov", "Dec"], "revenus": [..], "depenses": [..] }
+    Début de l'intervalle (jour, semaine ISO, mois) contenant la transaction.
+    PostgreSQL : date_trunc ; SQLite (tests locaux) : équivalent via date().
     """
-    today = datetime.now()
-    labels = []
-    data_revenus = []
-    data_depenses = []
-
-    # On boucle sur les 3 derniers mois (2 mois avant puis le mois précédent puis le mois actuel => ordre du graphique)
-    for i in range(2, -1, -1):
-        date_target = today - timedelta(days=i*30) # ajd - 30j = mois précédent
-        month = date_target.month
-        year = date_target.year
-        
-        # Nom du mois pour l'étiquette (ex: "12/2025")
-        labels.append(f"{month:02d}/{year}")
-
-        # Requête aggrégée pour aller vite
-        # Somme des transactions du mois filtrées par type => Select SUM(...) WHERE month=.. AND type=revenu/depense
-        revenu = db.query(func.sum(models.Transaction.amount))\
-            .join(models.Category)\
-            .filter(extract('year', models.Transaction.date) == year)\
-            .filter(extract('month', models.Transaction.date) == month)\
-            .filter(models.Category.type == 'revenu')\
-            .scalar() or 0 # .scalar() retourne la valeur ou None
-
-        depense = db.query(func.sum(models.Transaction.amount))\
-            .join(models.Category)\
-            .filter(extract('year', models.Transaction.date) == year)\
-            .filter(extract('month', models.Transaction.date) == month)\
-            .filter(models.Category.type == 'depense')\
-            .scalar() or 0
-
-        data_revenus.append(revenu)
-        data_depenses.append(depense)
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(granularity, models.Transaction.date)
+    if granularity == "day":
+        return func.date(models.Transaction.date)
+    if granularity == "week":
+        # Lundi de la semaine, comme date_trunc('week', ...)
+        return func.date(models.Transaction.date, "-6 days", "weekday 1")
+    return func.date(models.Transaction.date, "start of month")
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value[:10]).date()
+    return value
 
+def _series_buckets(start, end, granularity: str):
+    """
+    Liste ordonnée des débuts d'intervalles couvrant [start, end).
+    """
+    if granularity == "month":
+        step = relativedelta(months=1)
+    elif granularity == "week":
+        start = start - timedelta(days=start.weekday())
+        step = timedelta(weeks=1)
+    else:
+        step = timedelta(days=1)
+
+    buckets = []
+    current = start
+    while current < end:
+        buckets.append(current)
+        current = current + step
+    return buckets
+
+def _series_query(db, months: int, granularity: str):
+    """
+    Une seule requête GROUP BY intervalle avec un CASE sur le type de catégorie.
+    return: (requête, début, fin)
+    """
+    if granularity not in SERIES_GRANULARITIES:
+        raise ValueError(f"Granularité invalide : {granularity}")
+
+    end = month_start(datetime.now()) + relativedelta(months=1)
+    start = end - relativedelta(months=months)
+
+    if granularity == "month":
+        # Intervalle mensuel : l'agrégat (catégorie x mois) suffit
+        bucket = Rollup.month
+        amount = Rollup.total
+        query = select(bucket.label("bucket"))\
+            .join(models.Category, Rollup.category_id == models.Category.id)\
+            .filter(Rollup.month >= start, Rollup.month < end)
+    else:
+        bucket = _bucket_expression(db, granularity)
+        amount = models.Transaction.amount
+        query = select(bucket.label("bucket"))\
+            .join(models.Category, models.Transaction.category_id == models.Category.id)\
+            .filter(models.Transaction.date >= start, models.Transaction.date < end)
+
+    query = query\
+        .add_columns(
+            func.sum(case((models.Category.type == "revenu", amount), else_=0)).label("revenus"),
+            func.sum(case((models.Category.type == "depense", amount), else_=0)).label("depenses"),
+        )\
+        .group_by(bucket)
+    return query, start, end
+
+def _series_result(rows, start, end, granularity: str):
+    """
+    Les intervalles sans transaction sont complétés à 0 en une passe.
+    """
+    sums = {_to_date(r.bucket): (float(r.revenus or 0), float(r.depenses or 0)) for r in rows}
+
+    buckets = _series_buckets(start, end, granularity)
+    label_format = "%m/%Y" if granularity == "month" else "%d/%m"
     return {
-        "labels": labels,
-        "revenus": data_revenus,
-        "depenses": data_depenses
+        "labels": [b.strftime(label_format) for b in buckets],
+        "revenus": [sums.get(b, (0, 0))[0] for b in buckets],
+        "depenses": [sums.get(b, (0, 0))[1] for b in buckets],
+        "granularity": granularity,
     }
 
+@cached(TRANSACTIONS, CATEGORIES)
+def get_income_expense_series(db: Session, months: int = 3, granularity: str = "month"):
+    """
+    Séries revenus / dépenses sur les N derniers mois (mois en cours inclus),
+    par mois, semaine ou jour.
+    Retourne : { "labels": [..], "revenus": [..], "depenses": [..], "granularity": .. }
+    """
+    query, start, end = _series_query(db, months, granularity)
+    return _series_result(db.execute(query).all(), start, end, granularity)
+
+@cached(TRANSACTIONS, CATEGORIES)
+async def get_income_expense_series_async(db: AsyncSession, months: int = 3, granularity: str = "month"):
+    query, start, end = _series_query(db, months, granularity)
+    return _series_result((await db.execute(query)).all(), start, end, granularity)
+
+def get_last_3_months_stats(db: Session):
+    """
+    Prépare les données pour le Graphique 1 (Bâtons) : 3 derniers mois.
+    Retourne : { "labels": ["10/2025", "11/2025", "12/2025"], "revenus": [..], "depenses": [..] }
+    """
+    return get_income_expense_series(db, months=3, granularity="month")
+
+async def get_last_3_months_stats_async(db: AsyncSession):
+    return await get_income_expense_series_async(db, months=3, granularity="month")
+
+def _pie_query(index: services_category_index.CategoryIndex):
+    """
+    Dépenses du mois actuel sommées par catégorie en une seule requête ;
+    type et parent sont résolus depuis l'index des catégories en mémoire.
+    """
+    today = datetime.now().date()
+    query = select(models.Transaction.category_id, func.sum(models.Transaction.amount))\
+        .filter(models.Transaction.category_id.in_(index.ids_of_type("depense")))\
+        .group_by(models.Transaction.category_id)
+    return apply_period(query, models.Transaction.date, "current_month", today)
+
+@cached(TRANSACTIONS, CATEGORIES)
 def get_category_pie_stats(db: Session):
     """
     Prépare le Graphique 2 (Camembert) : Dépenses du mois actuel par Parent.
     Gère le détail pour le survol (tooltip).
     """
-    today = datetime.now()
-    
-    # Récupère toutes les dépenses du mois actuel avec leurs catégories
-    transactions = db.query(models.Transaction)\
-        .join(models.Category)\
-        .filter(extract('year', models.Transaction.date) == today.year)\
-        .filter(extract('month', models.Transaction.date) == today.month)\
-        .filter(models.Category.type == 'depense')\
-        .all()
+    index = services_category_index.get_index(db)
+    return _pie_result(db.execute(_pie_query(index)).all(), index)
 
+@cached(TRANSACTIONS, CATEGORIES)
+async def get_category_pie_stats_async(db: AsyncSession):
+    index = await services_category_index.get_index_async(db)
+    return _pie_result((await db.execute(_pie_query(index))).all(), index)
+
+def _pie_result(rows, index: services_category_index.CategoryIndex):
     # Structure : { "ParentName": { "total": 0, "details": {"SubName": 0} } } exemple : { "Alimentation": { "total": 100, "details": {"Courses": 70, "Restaurant": 30} } }
     stats = defaultdict(lambda: {"total": 0, "details": defaultdict(int)})
 
-    for t in transactions:
-        amount = t.amount
+    for category_id, total in rows:
+        amount = total or 0
+        category = index.get(category_id)
+        parent = index.parent(category_id)
         # Si parent existe, on groupe sous le parent, sinon sous la catégorie elle-même
-        if t.category.parent:
-            parent_name = t.category.parent.name
-            sub_name = t.category.name
+        if parent:
+            parent_name = parent.name
+            sub_name = category.name
         else:
-            parent_name = t.category.name
+            parent_name = category.name
             sub_name = "Autre"
         
         stats[parent_name]["total"] += amount
@@ -156,57 +246,44 @@ def get_category_pie_stats(db: Session):
         "tooltips": tooltips
     }
 
-def _apply_period_filter(query, period):
-    today = datetime.now()
-
-    if period == "current_month":
-        query = query.filter(
-            extract('year', models.Transaction.date) == today.year,
-            extract('month', models.Transaction.date) == today.month,
-        )
-    elif period == "last_month":
-        last_month = (today.replace(day=1) - timedelta(days=1))
-        query = query.filter(
-            extract('year', models.Transaction.date) == last_month.year,
-            extract('month', models.Transaction.date) == last_month.month,
+def _rollup_month_range(period):
+    """
+    Bornes [début, fin) si la période est alignée sur des mois entiers
+    (servie par l'agrégat), None sinon (la période glissante passe par la table brute).
+    """
+    start, end = resolve_period(period)
+    if is_month_aligned(start) and is_month_aligned(end):
+        return (
+            start.date() if start is not None else None,
+            end.date() if end is not None else None,
         )
-    elif period == "last_3_months":
-        start = today - timedelta(days=90)
-        query = query.filter(models.Transaction.date >= start)
-    # "all" => pas de filtre
+    return None
 
-    return query
+def _category_totals_filtered_query(period: str, category_id: int | None):
+    month_range = _rollup_month_range(period)
 
-def get_category_totals_filtered(db: Session, period: str, category_id: int | None = None):
-    query = (
-        db.query(
-            models.Category.id.label("category_id"),
-            models.Category.name.label("category_name"),
-            models.Category.type.label("category_type"),
-            func.sum(models.Transaction.amount).label("total"),
-        )
-        .join(models.Transaction, models.Transaction.category_id == models.Category.id)
-    )
-
-    # appliquer le filtre de période
-    query = _apply_period_filter(query, period)
+    if month_range is None:
+        query = _category_totals_query(models.Transaction.amount)\
+            .join(models.Transaction, models.Transaction.category_id == models.Category.id)
+        # appliquer le filtre de période
+        query = apply_period(query, models.Transaction.date, period)
+    else:
+        start, end = month_range
+        query = _category_totals_query(Rollup.total)\
+            .join(Rollup, Rollup.category_id == models.Category.id)
+        query = apply_date_range(query, Rollup.month, start, end)
 
     # appliquer le filtre catégorie si présent
     if category_id:
         query = query.filter(models.Category.id == category_id)
+    return query
 
-    rows = (
-        query
-        .group_by(models.Category.id, models.Category.name, models.Category.type)
-        .all()
-    )
+@cached(TRANSACTIONS, CATEGORIES)
+def get_category_totals_filtered(db: Session, period: str, category_id: int | None = None):
+    query = _category_totals_filtered_query(period, category_id)
+    return _category_totals_result(db.execute(query).all())
 
-    return [
-        {
-            "category_id": r.category_id,
-            "category_name": r.category_name,
-            "category_type": r.category_type,
-            "total": float(r.total or 0),
-        }
-        for r in rows
-    ]
+@cached(TRANSACTIONS, CATEGORIES)
+async def get_category_totals_filtered_async(db: AsyncSession, period: str, category_id: int | None = None):
+    query = _category_totals_filtered_query(period, category_id)
+    return _category_totals_result((await db.execute(query)).all())
@@ -0,0 +1,212 @@
+"""
+Calcul du solde (revenus - dépenses) côté SQL, avec snapshots mensuels.
+
+Le solde courant vaut : solde de clôture du dernier mois terminé (balance_snapshots)
++ somme signée des transactions postérieures à ce mois. Seules les transactions
+du mois en cours sont donc relues à chaque appel (intervalle de dates indexé).
+
+Une écriture datée dans le mois M invalide les snapshots des mois >= M ;
+ils sont recalculés au prochain appel à partir du dernier snapshot encore valide.
+Sur une session de réplica (info["read_only"]), les snapshots manquants sont
+calculés en mémoire sans être enregistrés.
+
+Clôture et écritures concurrentes : une écriture antidatée validée pendant le
+calcul d'une clôture rendrait le snapshot enregistré faux sans jamais l'invalider.
+La clôture relit donc les versions des données (services_versions) juste avant
+son commit et abandonne l'enregistrement si elles ont changé. Sur PostgreSQL,
+un verrou consultatif (exclusif pour la clôture, partagé pour invalidate_from)
+ferme aussi la fenêtre entre cette relecture et le commit ; sur SQLite, le
+verrou d'écriture de la base, pris par l'INSERT, suffit.
+
+get_total_balance_async (routes async) lit le solde en requêtes natives quand le
+dernier mois terminé est déjà clôturé ; la clôture elle-même, rare (une fois par
+mois ou après une écriture antidatée), reste sur le chemin synchrone (run_sync).
+"""
+
+from datetime import date, datetime
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import case, extract, func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.backend.db.models import BalanceSnapshot, Category, Transaction
+from . import services_versions
+from .services_periods import apply_date_range
+from .services_rollups import month_start
+
+# Clé du verrou consultatif PostgreSQL qui sérialise clôtures et invalidations
+SNAPSHOT_LOCK_KEY = 0x7A616465
+
+
+def _signed_amount():
+    """
+    +montant pour un revenu, -montant pour une dépense.
+    """
+    return case(
+        (Category.type == "revenu", Transaction.amount),
+        (Category.type == "depense", -Transaction.amount),
+        else_=0,
+    )
+
+
+def _balance_query(start: date | None, end: date | None):
+    query = select(func.sum(_signed_amount()))\
+        .select_from(Transaction)\
+        .join(Category, Transaction.category_id == Category.id)
+    return apply_date_range(query, Transaction.date, start, end)
+
+
+def balance_between(db: Session, start: date | None = None, end: date | None = None) -> float:
+    """
+    Solde des transactions de [start, end) en une seule requête SUM(CASE ...).
+    """
+    return float(db.execute(_balance_query(start, end)).scalar() or 0)
+
+
+async def balance_between_async(db: AsyncSession, start: date | None = None, end: date | None = None) -> float:
+    return float((await db.execute(_balance_query(start, end))).scalar() or 0)
+
+
+def _monthly_net(db: Session, start: date | None, end: date) -> dict[date, float]:
+    """
+    Solde net par mois sur [start, end), une requête groupée par (année, mois).
+    """
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    query = db.query(year, month, func.sum(_signed_amount()))\
+        .join(Category, Transaction.category_id == Category.id)
+    query = apply_date_range(query, Transaction.date, start, end)
+    return {
+        date(int(y), int(m), 1): float(total or 0)
+        for y, m, total in query.group_by(year, month).all()
+    }
+
+
+def _lock_snapshots(db: Session, shared: bool = False):
+    """
+    Verrou consultatif de transaction (PostgreSQL), libéré au commit / rollback.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    lock = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    db.execute(text(f"SELECT {lock}(:key)"), {"key": SNAPSHOT_LOCK_KEY})
+
+
+def _data_versions(db: Session) -> dict:
+    return services_versions.get_versions(db, (services_versions.TRANSACTIONS, services_versions.CATEGORIES))
+
+
+def latest_snapshot(db: Session) -> BalanceSnapshot | None:
+    return db.query(BalanceSnapshot).order_by(BalanceSnapshot.month.desc()).first()
+
+
+LATEST_SNAPSHOT_QUERY = (
+    select(BalanceSnapshot.month, BalanceSnapshot.closing_balance)
+    .order_by(BalanceSnapshot.month.desc())
+    .limit(1)
+)
+
+
+def close_months(db: Session, today: date | None = None) -> BalanceSnapshot | None:
+    """
+    Crée les snapshots manquants jusqu'au dernier mois terminé.
+    return: le dernier snapshot (None s'il n'y a encore aucun mois terminé à clôturer,
+            ou si une écriture concurrente a empêché de l'enregistrer)
+    """
+    current = month_start(today or datetime.now())
+    last_closed = current - relativedelta(months=1)
+    snapshot = latest_snapshot(db)
+    if snapshot is not None and snapshot.month >= last_closed:
+        return snapshot
+
+    read_only = db.info.get("read_only")
+    if not read_only:
+        _lock_snapshots(db)
+        versions = _data_versions(db)
+        # Relu après les versions : une invalidation validée entre-temps sera vue ou détectée
+        snapshot = latest_snapshot(db)
+        if snapshot is not None and snapshot.month >= last_closed:
+            # Clôturé entre-temps par un autre worker : on libère le verrou
+            # (pris pour la transaction) plutôt que le garder jusqu'à la fin de la requête
+            db.rollback()
+            return latest_snapshot(db)
+
+    if snapshot is None:
+        start = None
+        balance = 0.0
+    else:
+        start = snapshot.month + relativedelta(months=1)
+        balance = snapshot.closing_balance
+
+    nets = _monthly_net(db, start, current)
+    if start is None:
+        if not nets:
+            return None
+        start = min(nets)
+
+    new_snapshots = []
+    month = start
+    while month < current:
+        balance += nets.get(month, 0.0)
+        new_snapshots.append(BalanceSnapshot(month=month, closing_balance=balance))
+        month += relativedelta(months=1)
+
+    if read_only:
+        return new_snapshots[-1] if new_snapshots else snapshot
+
+    db.add_all(new_snapshots)
+    try:
+        db.flush()
+        if _data_versions(db) != versions:
+            # Écriture validée pendant le calcul : soldes peut-être périmés, rien n'est enregistré
+            db.rollback()
+            return None
+        db.commit()
+    except IntegrityError:
+        # Un autre worker a clôturé ces mois en même temps
+        db.rollback()
+        return latest_snapshot(db)
+    return new_snapshots[-1] if new_snapshots else snapshot
+
+
+def get_total_balance(db: Session, today: date | None = None) -> float:
+    """
+    Solde total = dernier snapshot + transactions depuis la fin du mois clôturé.
+    """
+    snapshot = close_months(db, today)
+    if snapshot is None:
+        return balance_between(db)
+
+    since = snapshot.month + relativedelta(months=1)
+    return snapshot.closing_balance + balance_between(db, start=since)
+
+
+async def get_total_balance_async(db: AsyncSession, today: date | None = None) -> float:
+    """
+    get_total_balance pour les routes async : si le dernier mois terminé est
+    clôturé, snapshot + transactions depuis en deux requêtes natives ; sinon la
+    clôture (verrou, écriture des snapshots) passe par get_total_balance.
+    """
+    last_closed = month_start(today or datetime.now()) - relativedelta(months=1)
+    snapshot = (await db.execute(LATEST_SNAPSHOT_QUERY)).first()
+    if snapshot is None or snapshot.month < last_closed:
+        return await db.run_sync(get_total_balance, today)
+
+    since = snapshot.month + relativedelta(months=1)
+    return snapshot.closing_balance + await balance_between_async(db, start=since)
+
+
+def invalidate_from(db: Session, *dates: datetime | date | None):
+    """
+    Supprime les snapshots des mois >= au plus ancien mois touché par une écriture.
+    Sans date : invalide tout (ex : changement de type d'une catégorie).
+    Ne commit pas : l'appelant commit avec son écriture.
+    """
+    _lock_snapshots(db, shared=True)
+    query = db.query(BalanceSnapshot)
+    months = [month_start(d) for d in dates if d is not None]
+    if months:
+        query = query.filter(BalanceSnapshot.month >= min(months))
+    query.delete(synchronize_session=False)
@@ -0,0 +1,170 @@
+"""
+Cache en mémoire (LRU borné + TTL) des agrégats du dashboard.
+
+Les agrégats de services_accueil ne dépendent que de l'état des tables et de
+leurs paramètres : @cached les mémorise sous la clé (fonction, arguments),
+la session db exclue. Il s'applique aussi aux services async (AsyncSession).
+
+Invalidation :
+- par étiquette ("transactions", "categories") après le commit d'une écriture :
+  services_versions.bump() note les tables modifiées dans session.info et le
+  listener after_commit ci-dessous vide les entrées correspondantes ;
+- par le temps : TTL, et au plus tard au changement de jour (les périodes
+  "current_month", "last_3_months"... et le mois du camembert en dépendent).
+Le cache est local au processus.
+
+Réglages : RESULT_CACHE_SIZE (défaut 256 entrées), RESULT_CACHE_TTL (défaut 60 s).
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.backend.db.read_routing import READ_YOUR_WRITES_SECONDS
+from .services_versions import CHANGED_TABLES_KEY
+
+
+def _next_day_timestamp(now: float) -> float:
+    tomorrow = datetime.fromtimestamp(now).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+
+class ResultCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()  # clé -> (valeur, expiration, étiquettes)
+        self._invalidated_at: dict[str, float] = {}
+        self.generation = 0  # incrémenté à chaque invalidation
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, name: str, counter: str):
+        self.stats.setdefault(name, {"hits": 0, "misses": 0})[counter] += 1
+
+    def get(self, key):
+        """
+        return: (trouvé, valeur)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._count(key[0], "misses")
+                return False, None
+            self._entries.move_to_end(key)
+            self._count(key[0], "hits")
+            return True, entry[0]
+
+    def set(self, key, value, tags: tuple[str, ...], generation: int):
+        """
+        generation : valeur lue avant le calcul ; si une écriture a invalidé le
+        cache entre-temps, le résultat est peut-être déjà périmé et n'est pas gardé.
+        """
+        now = time.time()
+        expires = min(now + self.ttl, _next_day_timestamp(now))
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (value, expires, tags)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tags: str):
+        now = time.time()
+        with self._lock:
+            self.generation += 1
+            for tag in tags:
+                self._invalidated_at[tag] = now
+            stale = [k for k, (_, _, entry_tags) in self._entries.items() if set(entry_tags) & set(tags)]
+            for key in stale:
+                del self._entries[key]
+
+    def recently_invalidated(self, tags: tuple[str, ...], window: float) -> bool:
+        now = time.time()
+        return any(now - self._invalidated_at.get(tag, 0) < window for tag in tags)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            functions = {name: dict(counters) for name, counters in self.stats.items()}
+            size = len(self._entries)
+        for counters in functions.values():
+            total = counters["hits"] + counters["misses"]
+            counters["hit_ratio"] = round(counters["hits"] / total, 3) if total else 0.0
+        return {"size": size, "maxsize": self.maxsize, "ttl_s": self.ttl, "functions": functions}
+
+
+result_cache = ResultCache(
+    maxsize=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", "60")),
+)
+
+
+def cached(*tags: str):
+    """
+    Mémorise fn(db, *args, **kwargs) selon (fn, args, kwargs).
+    tags : tables dont le résultat dépend (invalidation après écriture).
+    """
+    def store(db, key, value, generation: int):
+        # Un réplica peut ne pas encore voir une écriture toute récente :
+        # on ne fige pas son résultat dans le cache pendant cette fenêtre
+        if not (db.info.get("read_only") and result_cache.recently_invalidated(tags, READ_YOUR_WRITES_SECONDS)):
+            result_cache.set(key, value, tags, generation)
+
+    def decorator(fn):
+        name = fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(db, *args, **kwargs):
+                key = (name, args, tuple(sorted(kwargs.items())))
+                found, value = result_cache.get(key)
+                if found:
+                    return value
+                generation = result_cache.generation
+                value = await fn(db, *args, **kwargs)
+                store(db, key, value, generation)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(db: Session, *args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            found, value = result_cache.get(key)
+            if found:
+                return value
+
+            generation = result_cache.generation
+            value = fn(db, *args, **kwargs)
+            store(db, key, value, generation)
+            return value
+
+        return wrapper
+    return decorator
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    tables = session.info.pop(CHANGED_TABLES_KEY, None)
+    if tables:
+        result_cache.invalidate(*tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session):
+    session.info.pop(CHANGED_TABLES_KEY, None)
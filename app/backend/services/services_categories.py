@@ -1,11 +1,89 @@
 from app.backend.db import models
 from app.backend.db.schemas import CategoryCreate, CategoryUpdate
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from . import services_balance, services_category_index, services_versions
 
 def get_categories(db: Session):
     return db.query(models.Category).all()
 
 
+def _category_nodes(index: services_category_index.CategoryIndex, children_key: str) -> dict[int, dict]:
+    """
+    Noeuds sérialisables construits depuis l'index des catégories en mémoire,
+    chacun relié à ses enfants.
+    return: {id: noeud}
+    """
+    nodes = {
+        n.id: {"id": n.id, "name": n.name, "type": n.type, "parent_id": n.parent_id, children_key: []}
+        for n in index.nodes.values()
+    }
+    for n in index.nodes.values():
+        nodes[n.id][children_key] = [nodes[child_id] for child_id in n.children]
+    return nodes
+
+
+def get_categories_compact(db: Session) -> list[dict]:
+    """
+    Toutes les catégories (liste à plat) avec leurs sous-catégories, sans transactions.
+    """
+    return list(_category_nodes(services_category_index.get_index(db), "subcategories").values())
+
+
+async def get_categories_compact_async(db: AsyncSession) -> list[dict]:
+    return list(_category_nodes(await services_category_index.get_index_async(db), "subcategories").values())
+
+
+def get_category_node(db: Session, category_id: int) -> dict | None:
+    return _category_nodes(services_category_index.get_index(db), "subcategories").get(category_id)
+
+
+async def get_category_node_async(db: AsyncSession, category_id: int) -> dict | None:
+    return _category_nodes(await services_category_index.get_index_async(db), "subcategories").get(category_id)
+
+
+# Nombre de transactions et total par catégorie, lus sur l'agrégat mensuel
+ROLLUP_TOTALS_QUERY = (
+    select(
+        models.MonthlyCategoryTotal.category_id,
+        func.sum(models.MonthlyCategoryTotal.count),
+        func.sum(models.MonthlyCategoryTotal.total),
+    )
+    .group_by(models.MonthlyCategoryTotal.category_id)
+)
+
+
+def _category_tree(nodes: dict[int, dict], totals=None) -> list[dict]:
+    if totals is not None:
+        for node in nodes.values():
+            node["transaction_count"] = 0
+            node["total"] = 0.0
+        for category_id, count, total in totals:
+            if category_id in nodes:
+                nodes[category_id]["transaction_count"] = int(count or 0)
+                nodes[category_id]["total"] = float(total or 0)
+
+    return [n for n in nodes.values() if n["parent_id"] not in nodes]
+
+
+def get_category_tree(db: Session, with_totals: bool = False) -> list[dict]:
+    """
+    Arbre des catégories (racines puis enfants).
+    with_totals : nombre de transactions et total par catégorie, lus en une
+    seule requête agrégée sur l'agrégat mensuel.
+    """
+    nodes = _category_nodes(services_category_index.get_index(db), "children")
+    totals = db.execute(ROLLUP_TOTALS_QUERY).all() if with_totals else None
+    return _category_tree(nodes, totals)
+
+
+async def get_category_tree_async(db: AsyncSession, with_totals: bool = False) -> list[dict]:
+    nodes = _category_nodes(await services_category_index.get_index_async(db), "children")
+    totals = (await db.execute(ROLLUP_TOTALS_QUERY)).all() if with_totals else None
+    return _category_tree(nodes, totals)
+
+
 def create_category(db: Session, category: CategoryCreate) -> models.Category:
     """
     Docstring pour create_category
@@ -23,7 +101,9 @@ def create_category(db: Session, category: CategoryCreate) -> models.Category:
         parent_id=category.parent_id
     )
     db.add(db_category)
+    services_versions.bump(db, services_versions.CATEGORIES)
     db.commit()
+    services_category_index.invalidate()
     db.refresh(db_category)
     return db_category
 
@@ -46,12 +126,16 @@ def update_category(db: Session, category_id: int, category: CategoryUpdate) ->
 
     if category.name is not None:
         db_category.name = category.name
-    if category.type is not None:
+    if category.type is not None and category.type != db_category.type:
         db_category.type = category.type
+        # Le signe de toutes ses transactions change : snapshots à recalculer
+        services_balance.invalidate_from(db)
     if category.parent_id is not None:
         db_category.parent_id = category.parent_id
 
+    services_versions.bump(db, services_versions.CATEGORIES)
     db.commit()
+    services_category_index.invalidate()
     db.refresh(db_category)
     return db_category
 
@@ -69,8 +153,15 @@ def delete_category(db: Session, category_id: int) -> bool:
     category = db.query(models.Category).filter(models.Category.id == category_id).first()
     if not category:
         return False
+    # L'agrégat mensuel n'a pas de clé étrangère : on nettoie ses lignes
+    db.query(models.MonthlyCategoryTotal)\
+        .filter(models.MonthlyCategoryTotal.category_id == category_id)\
+        .delete(synchronize_session=False)
+    services_balance.invalidate_from(db)
+    services_versions.bump(db, services_versions.CATEGORIES, services_versions.TRANSACTIONS)
     db.delete(category)
     db.commit()
+    services_category_index.invalidate()
     return True
 
 
@@ -83,22 +174,27 @@ def get_categories_par_depense(db: Session) -> list[dict]:
     :return: Description
     :rtype: list[dict]
     """
-    categories = db.query(models.Category).all()
+    index = services_category_index.get_index(db)
+    rollup = models.MonthlyCategoryTotal
+    totals = dict(
+        db.query(rollup.category_id, func.sum(rollup.total))
+        .group_by(rollup.category_id)
+        .all()
+    )
     result = []
-    for c in categories:
+    for c in index.nodes.values():
         #calule des depenses totales pour les categories et sous-scategories
-        total = sum(t.amount for t in c.transactions)
-        for sub in c.subcategories:
-            total += sum(t.amount for t in sub.transactions)
+        total = float(totals.get(c.id) or 0)
+        for sub_id in c.children:
+            total += float(totals.get(sub_id) or 0)
         result.append({
             "id": c.id,
             "name": c.name,
             "type": c.type,
-            "subcategories": c.subcategories,
-            "transactions": c.transactions,
+            "subcategories": [
+                {"id": sub_id, "name": index.get(sub_id).name, "type": index.get(sub_id).type}
+                for sub_id in c.children
+            ],
             "spent": total
         })
     return result
-
-
-
@@ -0,0 +1,157 @@
+"""
+Index en mémoire de la hiérarchie des catégories.
+
+Les catégories changent rarement mais presque chaque requête a besoin du nom du
+parent ou du type d'une catégorie. L'index (id -> noeud avec parent, type et
+enfants) est chargé une fois par processus, en une requête, puis servi depuis
+la mémoire. services_categories l'invalide après chaque écriture : la version
+change et le prochain appel à get_index (ou get_index_async sur une
+AsyncSession) recharge les catégories.
+
+Un index chargé sur le réplica est gardé comme un autre : une écriture sur les
+catégories l'invalide de toute façon (version locale, NOTIFY entre workers).
+Seule exception, pendant READ_YOUR_WRITES_SECONDS après une invalidation le
+réplica peut ne pas encore voir l'écriture : son chargement est alors servi
+sans être gardé (même règle que services_cache).
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.backend.db import models
+from app.backend.db.read_routing import READ_YOUR_WRITES_SECONDS
+
+
+@dataclass
+class CategoryNode:
+    id: int
+    name: str
+    type: str
+    parent_id: int | None
+    children: list[int] = field(default_factory=list)
+
+
+class CategoryIndex:
+    def __init__(self, nodes: dict[int, CategoryNode], version: int):
+        self.nodes = nodes
+        self.version = version
+
+    def get(self, category_id: int | None) -> CategoryNode | None:
+        return self.nodes.get(category_id)
+
+    def parent(self, category_id: int | None) -> CategoryNode | None:
+        node = self.nodes.get(category_id)
+        return self.nodes.get(node.parent_id) if node else None
+
+    def parent_name(self, category_id: int | None) -> str | None:
+        """
+        Nom du parent, ou de la catégorie elle-même si elle est racine.
+        """
+        parent = self.parent(category_id)
+        if parent is not None:
+            return parent.name
+        node = self.nodes.get(category_id)
+        return node.name if node else None
+
+    def subtree_ids(self, category_id: int) -> list[int]:
+        """
+        La catégorie et tous ses descendants (filtre "parent inclut les enfants").
+        """
+        ids, stack, seen = [], [category_id], set()
+        while stack:
+            current = stack.pop()
+            if current in seen or current not in self.nodes:
+                continue
+            seen.add(current)
+            ids.append(current)
+            stack.extend(self.nodes[current].children)
+        return ids
+
+    def ids_of_type(self, category_type: str) -> list[int]:
+        return [n.id for n in self.nodes.values() if n.type == category_type]
+
+    def roots(self) -> list[CategoryNode]:
+        return [n for n in self.nodes.values() if n.parent_id not in self.nodes]
+
+
+_lock = threading.Lock()
+_version = 0
+_index: CategoryIndex | None = None
+_invalidated_at = 0.0
+
+
+INDEX_QUERY = (
+    select(models.Category.id, models.Category.name, models.Category.type, models.Category.parent_id)
+    .order_by(models.Category.id)
+)
+
+
+def _build(rows, version: int) -> CategoryIndex:
+    nodes = {r.id: CategoryNode(r.id, r.name, r.type, r.parent_id) for r in rows}
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id)
+        if parent is not None:
+            parent.children.append(node.id)
+    return CategoryIndex(nodes, version)
+
+
+def _current() -> tuple[CategoryIndex | None, int]:
+    index = _index
+    version = _version
+    if index is not None and index.version == version:
+        return index, version
+    return None, version
+
+
+def _publish(db, index: CategoryIndex, version: int) -> CategoryIndex:
+    global _index
+    if db.info.get("read_only") and time.time() - _invalidated_at < READ_YOUR_WRITES_SECONDS:
+        # Le réplica peut être en retard sur l'écriture qui vient d'invalider
+        # l'index : on sert ce chargement sans le garder
+        return index
+    with _lock:
+        if version == _version:
+            _index = index
+    return index
+
+
+def get_index(db: Session) -> CategoryIndex:
+    """
+    Index courant ; le (re)charge si une écriture l'a invalidé.
+    """
+    index, version = _current()
+    if index is not None:
+        return index
+    return _publish(db, _build(db.execute(INDEX_QUERY).all(), version), version)
+
+
+async def get_index_async(db: AsyncSession) -> CategoryIndex:
+    """
+    Variante de get_index pour les routes async : chargement par
+    await db.execute, sans bloquer la boucle d'événements. Le chargement
+    se fait hors verrou, la boucle ne doit pas attendre un verrou de thread.
+    """
+    index, version = _current()
+    if index is not None:
+        return index
+    return _publish(db, _build((await db.execute(INDEX_QUERY)).all(), version), version)
+
+
+def invalidate():
+    """
+    À appeler après le commit d'une écriture sur "categories".
+    """
+    global _version, _index, _invalidated_at
+    with _lock:
+        _version += 1
+        _index = None
+        _invalidated_at = time.time()
+
+
+def version() -> int:
+    return _version
@@ -0,0 +1,351 @@
+"""
+Import en masse de transactions depuis un export bancaire (CSV ou OFX).
+
+Le fichier est lu en flux et traité par lots de CHUNK_SIZE lignes :
+- validation du lot contre l'index des catégories (aucune requête par ligne),
+- insertion du lot via COPY sur PostgreSQL (executemany sur SQLite),
+- mise à jour de l'agrégat mensuel et des snapshots de solde une fois par lot,
+- un commit par lot.
+Les lignes invalides sont ignorées et remontées dans le rapport (numéro + erreur).
+
+Montants (même règle pour CSV et OFX) : l'appli stocke des montants positifs,
+le sens étant porté par le type de la catégorie. Dans le fichier, un montant
+négatif est un débit, un montant positif un crédit (ou un montant non signé) :
+- ligne sans catégorie : la catégorie par défaut est choisie selon le signe
+  (default_income_category_id pour un crédit, default_expense_category_id pour
+  un débit ; default_category_id sert aux lignes dont le sens correspond à son type) ;
+- ligne avec catégorie (CSV) : un débit sur une catégorie de revenu est rejeté.
+"""
+
+import csv
+import io
+import re
+from datetime import datetime
+from typing import IO, Iterator, NamedTuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.backend.db.models import Transaction
+from . import services_balance, services_category_index, services_rollups, services_versions
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+IMPORT_FORMATS = ("csv", "ofx")
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y %H:%M")
+
+
+class RawRow(NamedTuple):
+    line: int
+    date: str
+    label: str
+    amount: str
+    category: str | None
+    error: str | None = None  # ligne illisible (CSV mal formé, encodage invalide)
+
+
+class ParsedRow(NamedTuple):
+    line: int
+    date: datetime
+    label: str
+    amount: float
+    category_id: int
+
+
+# -----------------------------------------------------
+# LECTURE EN FLUX
+# -----------------------------------------------------
+def _rejected(line: int, error: str) -> RawRow:
+    return RawRow(line=line, date="", label="", amount="", category=None, error=error)
+
+
+def _decoded_lines(stream: IO[bytes], first_line: int, undecodable: list[tuple[int, str]]) -> Iterator[str]:
+    """
+    Lignes du fichier décodées une à une en UTF-8 strict. Une ligne mal encodée
+    est notée dans undecodable (numéro, erreur) et remplacée par une ligne vide :
+    la lecture continue, les lots déjà enregistrés gardent leur rapport.
+    """
+    for line_no, raw in enumerate(stream, start=first_line):
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            undecodable.append((line_no, f"encodage invalide (UTF-8 attendu) : octet {raw[e.start:e.start + 1]!r}"))
+            yield "\n"
+
+
+def _read_csv(stream: IO[bytes]) -> Iterator[RawRow]:
+    """
+    Colonnes attendues : date, label, amount et category (id ou nom) ou category_id.
+    Séparateur "," ou ";" (détecté sur l'en-tête).
+    """
+    try:
+        header = stream.readline().decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ValueError("En-tête CSV illisible : encodage UTF-8 attendu") from e
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    fields = [h.strip().lower() for h in next(csv.reader([header], delimiter=delimiter), [])]
+
+    undecodable = []
+    reader = csv.reader(_decoded_lines(stream, 2, undecodable), delimiter=delimiter)
+    while True:
+        # Lignes mal encodées lues par le tour précédent
+        while undecodable:
+            yield _rejected(*undecodable.pop(0))
+        previous = reader.line_num
+        try:
+            values = next(reader)
+        except StopIteration:
+            yield from (_rejected(*u) for u in undecodable)
+            return
+        except csv.Error as e:
+            # Ligne rejetée, la lecture reprend à la suivante
+            yield _rejected(reader.line_num + 1, f"ligne CSV illisible : {e}")
+            if reader.line_num == previous:
+                yield from (_rejected(*u) for u in undecodable)
+                return
+            continue
+        if not any(v.strip() for v in values):
+            continue
+        row = dict(zip(fields, values))
+        yield RawRow(
+            line=reader.line_num + 1,
+            date=row.get("date", ""),
+            label=row.get("label", ""),
+            amount=row.get("amount", ""),
+            category=row.get("category_id") or row.get("category"),
+        )
+
+
+_OFX_TAG = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+def _read_ofx(stream: IO[bytes]) -> Iterator[RawRow]:
+    """
+    Blocs <STMTTRN> d'un relevé OFX (SGML ou XML) : DTPOSTED, TRNAMT, NAME/MEMO.
+    L'OFX ne porte pas de catégorie : la catégorie par défaut du sens du montant s'applique.
+    """
+    text = io.TextIOWrapper(stream, encoding="latin-1", newline="")
+    current, start_line = None, 0
+    for line_no, line in enumerate(text, start=1):
+        for tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                current, start_line = {}, line_no
+            elif current is not None:
+                current.setdefault(tag, value.strip())
+        if current is not None and "</STMTTRN>" in line.upper():
+            yield RawRow(
+                line=start_line,
+                date=current.get("DTPOSTED", "")[:8],
+                label=current.get("NAME") or current.get("MEMO", ""),
+                amount=current.get("TRNAMT", ""),
+                category=None,
+            )
+            current = None
+
+
+def _chunks(rows: Iterator[RawRow], size: int) -> Iterator[list[RawRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -----------------------------------------------------
+# VALIDATION D'UN LOT
+# -----------------------------------------------------
+def _parse_date(value: str) -> datetime:
+    value = value.strip()
+    if re.fullmatch(r"\d{8}", value):
+        return datetime.strptime(value, "%Y%m%d")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"date invalide : '{value}'")
+
+
+def _parse_amount(value: str) -> float:
+    cleaned = value.strip().replace("\u00a0", "").replace(" ", "").replace(",", ".")
+    try:
+        return float(cleaned)
+    except ValueError:
+        raise ValueError(f"montant invalide : '{value}'")
+
+
+class Defaults(NamedTuple):
+    """
+    Catégories des lignes qui n'en précisent pas, selon le sens du montant.
+    """
+    income: int | None
+    expense: int | None
+
+
+def resolve_defaults(
+    index: services_category_index.CategoryIndex,
+    default_category_id: int | None = None,
+    default_income_category_id: int | None = None,
+    default_expense_category_id: int | None = None,
+) -> Defaults:
+    """
+    Vérifie les catégories par défaut (existence, type) ; lève ValueError sinon.
+    """
+    for name, category_id, expected in (
+        ("default_category_id", default_category_id, None),
+        ("default_income_category_id", default_income_category_id, "revenu"),
+        ("default_expense_category_id", default_expense_category_id, "depense"),
+    ):
+        if category_id is None:
+            continue
+        node = index.get(category_id)
+        if node is None:
+            raise ValueError(f"Catégorie par défaut inconnue ({name}) : {category_id}")
+        if expected is not None and node.type != expected:
+            raise ValueError(f"{name} doit être une catégorie de type '{expected}' : {category_id}")
+
+    legacy = index.get(default_category_id)
+    return Defaults(
+        income=default_income_category_id or (default_category_id if legacy and legacy.type == "revenu" else None),
+        expense=default_expense_category_id or (default_category_id if legacy and legacy.type == "depense" else None),
+    )
+
+
+def _validate_chunk(
+    chunk: list[RawRow],
+    index: services_category_index.CategoryIndex,
+    names: dict[str, int],
+    defaults: Defaults,
+) -> tuple[list[ParsedRow], list[dict]]:
+    valid, errors = [], []
+    for raw in chunk:
+        try:
+            if raw.error:
+                raise ValueError(raw.error)
+            label = raw.label.strip()
+            if not label:
+                raise ValueError("libellé manquant")
+            amount = _parse_amount(raw.amount)
+
+            if raw.category and raw.category.strip():
+                ref = raw.category.strip()
+                category_id = int(ref) if ref.isdigit() else names.get(ref.lower())
+                if category_id is None or index.get(category_id) is None:
+                    raise ValueError(f"catégorie inconnue : '{ref}'")
+                if amount < 0 and index.get(category_id).type == "revenu":
+                    raise ValueError(f"débit de {amount} sur une catégorie de revenu : '{ref}'")
+            elif amount < 0:
+                category_id = defaults.expense
+                if category_id is None:
+                    raise ValueError("débit sans catégorie : default_expense_category_id requis")
+            else:
+                category_id = defaults.income
+                if category_id is None:
+                    raise ValueError("crédit sans catégorie : default_income_category_id requis")
+
+            valid.append(ParsedRow(
+                line=raw.line,
+                date=_parse_date(raw.date),
+                label=label,
+                amount=abs(amount),
+                category_id=category_id,
+            ))
+        except ValueError as e:
+            errors.append({"line": raw.line, "error": str(e)})
+    return valid, errors
+
+
+# -----------------------------------------------------
+# INSERTION D'UN LOT
+# -----------------------------------------------------
+def _copy_rows(db: Session, rows: list[ParsedRow]):
+    """
+    COPY ... FROM STDIN (PostgreSQL) : un seul aller-retour pour tout le lot.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for r in rows:
+        writer.writerow([r.amount, r.label, r.date.isoformat(sep=" "), r.category_id])
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY transactions (amount, label, date, category_id) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(db: Session, rows: list[ParsedRow]):
+    """
+    Insère un lot déjà validé.
+    Ne met à jour ni l'agrégat ni les versions, ne commit pas (voir write_batch).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_rows(db, rows)
+    else:
+        db.execute(
+            insert(Transaction),
+            [
+                {"amount": r.amount, "label": r.label, "date": r.date, "category_id": r.category_id}
+                for r in rows
+            ],
+        )
+
+
+def write_batch(db: Session, rows: list[ParsedRow]):
+    """
+    Enregistre un lot validé et commit : lignes, agrégat mensuel (un upsert pour
+    le lot), snapshots de solde invalidés, version de la table.
+    Utilisé par l'import et par le générateur synthétique.
+    """
+    insert_rows(db, rows)
+    services_rollups.apply_deltas(db, services_rollups.transaction_deltas(rows))
+    services_balance.invalidate_from(db, min(r.date for r in rows))
+    services_versions.bump(db, services_versions.TRANSACTIONS)
+    db.commit()
+
+
+def import_transactions(
+    db: Session,
+    stream: IO[bytes],
+    fmt: str,
+    default_category_id: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    default_income_category_id: int | None = None,
+    default_expense_category_id: int | None = None,
+) -> dict:
+    """
+    Importe un fichier CSV ou OFX par lots.
+    return: { imported, rejected, batches, errors: [{line, error}] }
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Format d'import invalide : {fmt}")
+
+    index = services_category_index.get_index(db)
+    names = {n.name.lower(): n.id for n in index.nodes.values()}
+    defaults = resolve_defaults(index, default_category_id, default_income_category_id, default_expense_category_id)
+
+    raw_rows = _read_csv(stream) if fmt == "csv" else _read_ofx(stream)
+
+    report = {"imported": 0, "rejected": 0, "batches": 0, "errors": []}
+    for chunk in _chunks(raw_rows, chunk_size):
+        valid, errors = _validate_chunk(chunk, index, names, defaults)
+        report["rejected"] += len(errors)
+        report["errors"].extend(errors[:max(0, MAX_REPORTED_ERRORS - len(report["errors"]))])
+        if not valid:
+            continue
+
+        write_batch(db, valid)
+
+        report["imported"] += len(valid)
+        report["batches"] += 1
+
+    return report
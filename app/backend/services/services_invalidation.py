@@ -0,0 +1,186 @@
+"""
+Invalidation des caches entre processus (workers uvicorn, réplicas du backend).
+
+Le cache des agrégats (services_cache) et l'index des catégories
+(services_category_index) sont propres à chaque processus : une écriture
+servie par un autre processus doit aussi les vider. Un thread par processus
+écoute les changements :
+- PostgreSQL (psycopg2) : LISTEN sur le canal publié par services_versions à
+  chaque commit (NOTIFY, délivré seulement si l'écriture est validée). Les
+  événements du processus lui-même sont ignorés : il a déjà vidé ses caches
+  après son commit ;
+- autres bases (SQLite) : lecture de data_versions toutes les
+  INVALIDATION_POLL_SECONDS, les tables dont la version a changé sont vidées
+  (y compris après les écritures du processus lui-même : éviction en double,
+  sans effet sur les résultats).
+Après une coupure de l'écoute, des événements ont pu être perdus : tout est vidé.
+Le thread est lancé et arrêté avec le serveur (start / stop, appelés par le
+lifespan de main.py), jamais à l'import.
+
+Les agrégats en cache couvrent toutes les catégories et tous les mois :
+l'éviction se fait par table, les catégories / mois de l'événement sont gardés
+pour le diagnostic (/internal/cache).
+
+Réglages : INVALIDATION_BUS (auto | notify | poll | off, défaut auto),
+INVALIDATION_POLL_SECONDS (défaut 1).
+"""
+
+import json
+import logging
+import os
+import select
+import threading
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.backend.db.database import SessionLocal, engine
+from app.backend.db.pool import install_connect_retry
+from . import services_category_index, services_versions
+from .services_cache import result_cache
+
+MODE = os.getenv("INVALIDATION_BUS", "auto").strip().lower()
+POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_SECONDS", "1"))
+RECONNECT_SECONDS = 5
+TABLES = (services_versions.TRANSACTIONS, services_versions.CATEGORIES)
+
+logger = logging.getLogger("zadeet.invalidation")
+
+_lock = threading.Lock()
+_state = {"mode": None, "connected": False, "evictions": 0, "last_event": None}
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def evict(tables, event: dict | None = None):
+    """
+    Vide les caches locaux qui dépendent de ces tables.
+    """
+    tables = set(tables) & set(TABLES)
+    if not tables:
+        return
+    result_cache.invalidate(*tables)
+    if services_versions.CATEGORIES in tables:
+        services_category_index.invalidate()
+    with _lock:
+        _state["evictions"] += 1
+        _state["last_event"] = {
+            "at": datetime.now().isoformat(timespec="milliseconds"),
+            "tables": sorted(tables),
+            **({"categories": event.get("categories"), "months": event.get("months")} if event else {}),
+        }
+
+
+def receive(payload: str):
+    """
+    Traite un événement NOTIFY (JSON de services_versions.change_event).
+    """
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        logger.warning("Événement d'invalidation illisible : %r", payload[:200])
+        evict(TABLES)
+        return
+    if event.get("origin") != services_versions.PROCESS_ID:
+        evict(event.get("tables", TABLES), event)
+
+
+# -----------------------------------------------------
+# POSTGRESQL : LISTEN / NOTIFY
+# -----------------------------------------------------
+def _listen_loop():
+    # Connexion dédiée, hors du pool des requêtes
+    listen_engine = create_engine(engine.url, poolclass=NullPool)
+    install_connect_retry(listen_engine)
+    while not _stop.is_set():
+        try:
+            with listen_engine.connect() as conn:
+                conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+                conn.exec_driver_sql(f"LISTEN {services_versions.NOTIFY_CHANNEL}")
+                dbapi_connection = conn.connection.dbapi_connection
+                _state["connected"] = True
+                # Écritures passées pendant la coupure (ou avant le démarrage)
+                evict(TABLES)
+                while not _stop.is_set():
+                    if select.select([dbapi_connection], [], [], POLL_SECONDS) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        receive(dbapi_connection.notifies.pop(0).payload)
+        except Exception as e:  # base redémarrée, bascule : on se réabonne
+            _state["connected"] = False
+            logger.warning("Écoute des invalidations interrompue (%s), reprise dans %s s", e, RECONNECT_SECONDS)
+            _stop.wait(RECONNECT_SECONDS)
+    _state["connected"] = False
+    listen_engine.dispose()
+
+
+# -----------------------------------------------------
+# AUTRES BASES : SONDAGE DE data_versions
+# -----------------------------------------------------
+def _poll_loop():
+    seen = None
+    while not _stop.is_set():
+        try:
+            with SessionLocal() as db:
+                versions = services_versions.get_versions(db, TABLES)
+        except Exception:  # base pas encore migrée ou injoignable
+            _state["connected"] = False
+            seen = None
+            _stop.wait(POLL_SECONDS)
+            continue
+        _state["connected"] = True
+        if seen is None:
+            # Entrées calculées avant cette première lecture : version inconnue
+            evict(TABLES)
+        else:
+            changed = [t for t in TABLES if versions[t][0] != seen[t][0]]
+            if changed:
+                evict(changed)
+        seen = versions
+        _stop.wait(POLL_SECONDS)
+    _state["connected"] = False
+
+
+def _resolve_mode() -> str:
+    if MODE != "auto":
+        return MODE
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        return "notify"
+    return "poll"
+
+
+def start():
+    """
+    Lance le thread d'écoute de ce processus (une seule fois ; au démarrage du serveur).
+    """
+    global _thread
+    with _lock:
+        if _state["mode"] is not None:
+            return
+        _state["mode"] = _resolve_mode()
+    if _state["mode"] == "off":
+        return
+    _stop.clear()
+    target = _listen_loop if _state["mode"] == "notify" else _poll_loop
+    _thread = threading.Thread(target=target, name="cache-invalidation", daemon=True)
+    _thread.start()
+
+
+def stop():
+    """
+    Arrête le thread d'écoute (arrêt du serveur) ; il se termine en au plus POLL_SECONDS.
+    """
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join()
+        _thread = None
+    with _lock:
+        _state["mode"] = None
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {**_state, "last_event": _state["last_event"] and dict(_state["last_event"])}
@@ -0,0 +1,65 @@
+"""
+Résolution des périodes de filtrage ("current_month", "last_month", ...).
+
+Chaque période est traduite en intervalle semi-ouvert [début, fin) sur la date,
+pour que les filtres s'écrivent "date >= début AND date < fin" : contrairement à
+extract('month', date) == X, ce prédicat peut utiliser un index sur la date.
+"""
+
+from datetime import date, datetime, time
+from dateutil.relativedelta import relativedelta
+
+PERIODS = ("current_month", "last_month", "last_3_months", "all")
+
+
+def resolve_period(period: str | None, today: date | None = None) -> tuple[datetime | None, datetime | None]:
+    """
+    Bornes [début, fin) de la période. None = pas de borne.
+    Une période inconnue ou "all" n'est pas filtrée.
+    """
+    today = today or date.today()
+    current = datetime.combine(today.replace(day=1), time.min)
+    next_month = current + relativedelta(months=1)
+
+    if period == "current_month":
+        return current, next_month
+    if period == "last_month":
+        return current - relativedelta(months=1), current
+    if period == "last_3_months":
+        return datetime.combine(today - relativedelta(months=3), time.min), next_month
+    return None, None
+
+
+def month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    """
+    Bornes [1er du mois, 1er du mois suivant) d'un mois donné.
+    """
+    start = datetime(year, month, 1)
+    return start, start + relativedelta(months=1)
+
+
+def is_month_aligned(bound: datetime | None) -> bool:
+    """
+    True si la borne tombe sur un début de mois (ou est absente) :
+    la période peut alors être servie par l'agrégat mensuel.
+    """
+    return bound is None or (bound.day == 1 and bound.time() == time.min)
+
+
+def apply_date_range(query, column, start: datetime | None, end: datetime | None):
+    """
+    Ajoute les prédicats "column >= start" et "column < end" à la requête.
+    """
+    if start is not None:
+        query = query.filter(column >= start)
+    if end is not None:
+        query = query.filter(column < end)
+    return query
+
+
+def apply_period(query, column, period: str | None, today: date | None = None):
+    """
+    Filtre la requête sur la période, via un intervalle [début, fin).
+    """
+    start, end = resolve_period(period, today)
+    return apply_date_range(query, column, start, end)
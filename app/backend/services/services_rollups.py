@@ -0,0 +1,210 @@
+"""
+Service de maintenance de l'agrégat mensuel par catégorie (monthly_category_totals).
+
+Chaque écriture de transaction applique un delta (montant, nombre) sur la ligne
+(mois, catégorie) concernée, dans la même transaction SQL que l'écriture.
+Le dashboard lit ensuite cet agrégat au lieu de rescanner "transactions".
+
+Commandes d'administration :
+    python -m app.backend.services.services_rollups rebuild
+    python -m app.backend.services.services_rollups check
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import delete, extract, func, insert
+from sqlalchemy.orm import Session
+
+from app.backend.db.models import MonthlyCategoryTotal, Transaction
+from .services_versions import CHANGED_KEYS_KEY
+
+# Tolérance sur les totaux (cumul de flottants)
+TOLERANCE = 0.005
+
+
+def month_start(when: datetime | date) -> date:
+    """
+    Clé de mois d'une date : le 1er jour du mois.
+    """
+    return date(when.year, when.month, 1)
+
+
+def _upsert_statement(db: Session, rows: list[dict]):
+    """
+    INSERT ... ON CONFLICT (month, category_id) DO UPDATE qui additionne les deltas.
+    Retourne None si le dialecte ne supporte pas l'upsert.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    stmt = dialect_insert(MonthlyCategoryTotal).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MonthlyCategoryTotal.month, MonthlyCategoryTotal.category_id],
+        set_={
+            "total": MonthlyCategoryTotal.total + stmt.excluded.total,
+            "count": MonthlyCategoryTotal.count + stmt.excluded.count,
+        },
+    )
+
+
+def apply_deltas(db: Session, deltas: dict[tuple[int, date], tuple[float, int]]):
+    """
+    Applique un lot de deltas {(category_id, mois): (montant, nombre)} sur l'agrégat.
+    Ne commit pas : l'appelant commit avec son écriture.
+    Les lignes retombées à 0 transaction sont supprimées.
+    """
+    rows = [
+        {"category_id": category_id, "month": month, "total": amount, "count": count}
+        for (category_id, month), (amount, count) in deltas.items()
+        if category_id is not None and (amount or count)
+    ]
+    if not rows:
+        return
+    # Catégories et mois touchés, publiés au commit (services_versions)
+    db.info.setdefault(CHANGED_KEYS_KEY, set()).update((r["category_id"], r["month"]) for r in rows)
+
+    stmt = _upsert_statement(db, rows)
+    if stmt is not None:
+        db.execute(stmt)
+    else:
+        for row in rows:
+            current = db.get(MonthlyCategoryTotal, (row["month"], row["category_id"]))
+            if current is None:
+                db.add(MonthlyCategoryTotal(**row))
+            else:
+                current.total += row["total"]
+                current.count += row["count"]
+        db.flush()
+
+    db.execute(
+        delete(MonthlyCategoryTotal)
+        .where(MonthlyCategoryTotal.count <= 0)
+        .where(MonthlyCategoryTotal.category_id.in_({r["category_id"] for r in rows}))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _raw_totals(db: Session) -> dict[tuple[int, date], tuple[float, int]]:
+    """
+    Agrégat recalculé depuis la table brute (scan complet, réservé à l'admin).
+    """
+    year = extract("year", Transaction.date)
+    month = extract("month", Transaction.date)
+    rows = (
+        db.query(
+            Transaction.category_id,
+            year.label("year"),
+            month.label("month"),
+            func.sum(Transaction.amount).label("total"),
+            func.count(Transaction.id).label("count"),
+        )
+        .filter(Transaction.category_id.isnot(None))
+        .group_by(Transaction.category_id, year, month)
+        .all()
+    )
+    return {
+        (r.category_id, date(int(r.year), int(r.month), 1)): (float(r.total or 0), r.count)
+        for r in rows
+    }
+
+
+def rebuild(db: Session) -> int:
+    """
+    Reconstruit entièrement l'agrégat depuis "transactions".
+    return: le nombre de lignes (mois, catégorie) écrites
+    """
+    totals = _raw_totals(db)
+    db.execute(delete(MonthlyCategoryTotal))
+    if totals:
+        db.execute(
+            insert(MonthlyCategoryTotal),
+            [
+                {"category_id": category_id, "month": month, "total": total, "count": count}
+                for (category_id, month), (total, count) in totals.items()
+            ],
+        )
+    db.commit()
+    return len(totals)
+
+
+def check_consistency(db: Session) -> list[dict]:
+    """
+    Compare l'agrégat à la table brute.
+    return: la liste des écarts (vide si tout est cohérent)
+    """
+    expected = _raw_totals(db)
+    actual = {
+        (r.category_id, r.month): (r.total, r.count)
+        for r in db.query(MonthlyCategoryTotal).all()
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=lambda k: (k[1], k[0])):
+        exp_total, exp_count = expected.get(key, (0.0, 0))
+        act_total, act_count = actual.get(key, (0.0, 0))
+        if exp_count != act_count or abs(exp_total - act_total) > TOLERANCE:
+            mismatches.append({
+                "category_id": key[0],
+                "month": key[1].isoformat(),
+                "expected_total": exp_total,
+                "actual_total": act_total,
+                "expected_count": exp_count,
+                "actual_count": act_count,
+            })
+    return mismatches
+
+
+def transaction_deltas(transactions, sign: int = 1) -> dict[tuple[int, date], tuple[float, int]]:
+    """
+    Regroupe des transactions (objets ou lignes avec category_id, date, amount)
+    en deltas par (catégorie, mois). sign=-1 pour des suppressions.
+    """
+    deltas = defaultdict(lambda: (0.0, 0))
+    for t in transactions:
+        if t.category_id is None or t.date is None:
+            continue
+        key = (t.category_id, month_start(t.date))
+        total, count = deltas[key]
+        deltas[key] = (total + sign * (t.amount or 0), count + sign)
+    return dict(deltas)
+
+
+def merge_deltas(*deltas_list) -> dict[tuple[int, date], tuple[float, int]]:
+    """
+    Fusionne plusieurs dicts de deltas (ex : retrait de l'ancienne version
+    d'une transaction + ajout de la nouvelle) pour un seul upsert.
+    """
+    merged = defaultdict(lambda: (0.0, 0))
+    for deltas in deltas_list:
+        for key, (amount, count) in deltas.items():
+            total, n = merged[key]
+            merged[key] = (total + amount, n + count)
+    return dict(merged)
+
+
+if __name__ == "__main__":
+    from app.backend.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Maintenance de monthly_category_totals")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"Agrégat reconstruit : {rebuild(db)} lignes (mois, catégorie).")
+        else:
+            mismatches = check_consistency(db)
+            for m in mismatches:
+                print(m)
+            print("Agrégat cohérent." if not mismatches else f"{len(mismatches)} écart(s) détecté(s).")
+            raise SystemExit(1 if mismatches else 0)
+    finally:
+        db.close()
@@ -0,0 +1,269 @@
+"""
+Générateur de données synthétiques : arbre de catégories réaliste et N transactions.
+
+Sert aux benchmarks et à reproduire des problèmes à volume de production.
+- déterministe : même graine + même date de fin => mêmes lignes ;
+- récurrences mensuelles (salaire, loyer, énergie, abonnements) avec une
+  dérive annuelle des montants ;
+- dépenses variables réparties selon la saison (énergie l'hiver, vacances
+  l'été, achats en décembre) et le jour de la semaine (restaurants le week-end) ;
+- les montants récurrents sont multipliés par le nombre de "foyers" que
+  représentent les lignes variables (HOUSEHOLD_ROWS_PER_MONTH par foyer et par
+  mois) : le solde reste plausible à 1M de lignes comme à 1 000 ;
+- chargement par lots via services_import.write_batch (COPY sur PostgreSQL,
+  agrégat mensuel, snapshots, version, un commit par lot).
+
+Usage :
+    python -m app.backend.services.services_synthetic --transactions 1000000 --seed 42 --reset
+"""
+
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate, chain, islice
+from typing import Iterator, NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app.backend.db import migrations, models
+from . import services_category_index, services_import, services_versions
+from .services_import import ParsedRow
+
+BATCH_SIZE = 50_000
+DEFAULT_MONTHS = 24
+YEARLY_DRIFT = 0.02  # hausse annuelle des montants récurrents
+# Dépenses variables d'un foyer par mois : à peu près ce que couvrent ses
+# revenus récurrents une fois les charges fixes payées (léger excédent)
+HOUSEHOLD_ROWS_PER_MONTH = 33
+
+# Facteur par mois, de janvier à décembre
+FLAT = (1.0,) * 12
+WINTER = (1.6, 1.5, 1.2, 0.9, 0.7, 0.5, 0.5, 0.5, 0.6, 0.9, 1.3, 1.6)
+SUMMER = (0.7, 0.7, 0.8, 0.9, 1.0, 1.2, 1.7, 1.7, 1.0, 0.8, 0.8, 1.0)
+CHRISTMAS = (1.3, 0.8, 0.8, 0.9, 0.9, 1.0, 1.2, 0.8, 1.0, 1.0, 1.4, 2.2)
+DECEMBER_ONLY = (0,) * 11 + (1.0,)
+# Activité par jour de la semaine (lundi..dimanche)
+WEEKDAYS = (0.9, 0.9, 0.95, 1.0, 1.25, 1.35, 0.65)
+
+
+class CategorySpec(NamedTuple):
+    name: str
+    type: str
+    parent: str | None
+    weight: float = 0.0           # part des dépenses variables (0 : récurrences seulement)
+    median: float = 0.0           # montant médian (loi log-normale)
+    spread: float = 0.5
+    merchants: tuple[str, ...] = ()
+    season: tuple[float, ...] = FLAT
+    weekend: float = 1.0          # facteur vendredi / samedi
+
+
+class Recurring(NamedTuple):
+    category: str
+    label: str
+    day: int
+    amount: float
+    season: tuple[float, ...] = FLAT  # 0 : pas d'occurrence ce mois-là
+
+
+# Parents avant enfants
+CATEGORIES = (
+    CategorySpec("Salaire", "revenu", None),
+    CategorySpec("Freelance", "revenu", None, 0.4, 450, 0.6, ("Virement client", "Malt", "Règlement facture")),
+    CategorySpec("Remboursements", "revenu", None, 1.0, 25, 0.8, ("Remboursement Sécu", "Remboursement mutuelle")),
+    CategorySpec("Alimentation", "depense", None, 2, 15, 0.6, ("Marché", "Épicerie du coin")),
+    CategorySpec("Courses", "depense", "Alimentation", 20, 45, 0.7,
+                 ("Carrefour Market", "Carrefour City", "Monoprix", "Franprix", "Lidl", "Picard"), weekend=1.5),
+    CategorySpec("Restaurant", "depense", "Alimentation", 10, 22, 0.6,
+                 ("Restaurant Le Petit Zinc", "Brasserie du Marché", "Uber Eats", "Deliveroo", "Sushi Shop"),
+                 weekend=2.0),
+    CategorySpec("Boulangerie", "depense", "Alimentation", 14, 4.5, 0.5,
+                 ("Boulangerie Paul", "Maison Kayser", "Boulangerie du Marché")),
+    CategorySpec("Logement", "depense", None, 1, 60, 0.9, ("Leroy Merlin", "Castorama", "IKEA")),
+    CategorySpec("Loyer", "depense", "Logement"),
+    CategorySpec("Énergie", "depense", "Logement"),
+    CategorySpec("Transport", "depense", None, 3, 14, 0.8, ("Uber", "Bolt", "Vélib")),
+    CategorySpec("Essence", "depense", "Transport", 4, 55, 0.3, ("Total Énergies", "Shell", "Esso"), SUMMER),
+    CategorySpec("Train", "depense", "Transport", 1.5, 60, 0.7, ("SNCF Voyages", "Ouigo", "Trainline"), SUMMER),
+    CategorySpec("Loisirs", "depense", None, 4, 25, 0.9, ("Cinéma Pathé", "Fnac", "Decathlon", "Théâtre"),
+                 weekend=1.8),
+    CategorySpec("Streaming", "depense", "Loisirs"),
+    CategorySpec("Sport", "depense", "Loisirs"),
+    CategorySpec("Vacances", "depense", "Loisirs", 1.5, 120, 1.0, ("Airbnb", "Booking.com", "Camping des Pins"),
+                 SUMMER),
+    CategorySpec("Santé", "depense", None, 2, 25, 0.8, ("Pharmacie Centrale", "Cabinet médical", "Dentiste"),
+                 WINTER),
+    CategorySpec("Shopping", "depense", None, 5, 40, 1.0, ("Amazon Marketplace", "Zara", "Fnac Darty", "Cdiscount"),
+                 CHRISTMAS),
+)
+
+RECURRING = (
+    Recurring("Salaire", "Virement salaire", 28, 2450.0),
+    Recurring("Salaire", "Prime de fin d'année", 20, 1200.0, DECEMBER_ONLY),
+    Recurring("Loyer", "Loyer appartement", 5, 890.0),
+    Recurring("Énergie", "EDF Électricité", 10, 55.0, WINTER),
+    Recurring("Énergie", "Engie Gaz", 12, 35.0, WINTER),
+    Recurring("Logement", "Assurance habitation", 15, 18.9),
+    Recurring("Transport", "RATP Navigo", 1, 86.4),
+    Recurring("Streaming", "Netflix", 12, 13.49),
+    Recurring("Streaming", "Spotify", 20, 11.12),
+    Recurring("Sport", "Salle de sport Basic-Fit", 3, 29.99),
+)
+
+
+# -----------------------------------------------------
+# CATÉGORIES
+# -----------------------------------------------------
+def ensure_categories(db: Session) -> dict[str, int]:
+    """
+    Crée les catégories manquantes (par nom), en une seule transaction.
+    return: { nom: id }
+    """
+    ids = dict(db.query(models.Category.name, models.Category.id).all())
+    created = False
+    for spec in CATEGORIES:
+        if spec.name in ids:
+            continue
+        category = models.Category(name=spec.name, type=spec.type, parent_id=ids.get(spec.parent))
+        db.add(category)
+        db.flush()
+        ids[spec.name] = category.id
+        created = True
+
+    if created:
+        services_versions.bump(db, services_versions.CATEGORIES)
+        db.commit()
+        services_category_index.invalidate()
+    return ids
+
+
+# -----------------------------------------------------
+# TRANSACTIONS
+# -----------------------------------------------------
+def _months(start: date, end: date) -> Iterator[date]:
+    current = start
+    while current <= end:
+        yield current
+        current = (current + timedelta(days=32)).replace(day=1)
+
+
+def _recurring_rows(rng: random.Random, start: date, end: date, ids: dict[str, int]) -> list[ParsedRow]:
+    rows = []
+    for month in _months(start, end):
+        drift = (1 + YEARLY_DRIFT) ** ((month - start).days / 365)
+        for r in RECURRING:
+            factor = r.season[month.month - 1]
+            when = month.replace(day=r.day)
+            if not factor or when > end:
+                continue
+            # Les montants indexés sur la saison (énergie) varient d'un mois à l'autre
+            amount = r.amount * drift * factor * (rng.uniform(0.9, 1.1) if r.season is not FLAT else 1)
+            rows.append(ParsedRow(0, datetime(when.year, when.month, when.day, 9), r.label,
+                                  round(amount, 2), ids[r.category]))
+    return rows
+
+
+def _variable_rows(rng: random.Random, start: date, end: date, ids: dict[str, int], count: int) -> Iterator[ParsedRow]:
+    """
+    Tire le couple (jour, catégorie) selon la saison et le jour de la semaine,
+    puis l'heure, le montant (log-normal) et le commerçant.
+    """
+    specs = [s for s in CATEGORIES if s.weight]
+    days = [start + timedelta(days=d) for d in range((end - start).days + 1)]
+    # Une entrée par couple (jour, catégorie) : un seul tirage pondéré par ligne
+    pairs = [(datetime(d.year, d.month, d.day), s) for d in days for s in specs]
+    weights = list(accumulate(
+        s.weight * s.season[d.month - 1] * WEEKDAYS[d.weekday()] * (s.weekend if d.weekday() in (4, 5) else 1)
+        for d in days for s in specs
+    ))
+    minutes = [timedelta(minutes=m) for m in range(7 * 60, 23 * 60)]
+
+    produced = 0
+    while produced < count:
+        size = min(BATCH_SIZE, count - produced)
+        for day, spec in rng.choices(pairs, cum_weights=weights, k=size):
+            label = rng.choice(spec.merchants)
+            if spec.type == "depense":
+                label = f"{label} CB*{rng.randrange(10000):04d}"
+            yield ParsedRow(
+                0,
+                day + rng.choice(minutes),
+                label,
+                round(spec.median * math.exp(rng.gauss(0, spec.spread)), 2),
+                ids[spec.name],
+            )
+        produced += size
+
+
+def generate(
+    db: Session,
+    transactions: int,
+    seed: int = 42,
+    months: int = DEFAULT_MONTHS,
+    end: date | None = None,
+    reset: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    Génère `transactions` lignes sur les `months` derniers mois (jusqu'à `end`).
+    Applique d'abord les migrations en attente ; reset=True : supprime et recrée
+    tout le schéma (toutes les données sont perdues).
+    return: { transactions, categories, households, batches, seconds }
+    """
+    started = time.perf_counter()
+    engine = db.get_bind()
+    if reset:
+        migrations.reset(engine)
+        services_category_index.invalidate()
+    else:
+        migrations.upgrade(engine)
+
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end.replace(day=1)
+    for _ in range(months - 1):
+        start = (start - timedelta(days=1)).replace(day=1)
+
+    ids = ensure_categories(db)
+    recurring = _recurring_rows(rng, start, end, ids)[-transactions:] if transactions else []
+    variable = transactions - len(recurring)
+    households = max(1.0, variable / (months * HOUSEHOLD_ROWS_PER_MONTH))
+    if households > 1:
+        recurring = [r._replace(amount=round(r.amount * households, 2)) for r in recurring]
+    rows = chain(recurring, _variable_rows(rng, start, end, ids, variable))
+
+    batches = 0
+    while batch := list(islice(rows, batch_size)):
+        services_import.write_batch(db, batch)
+        batches += 1
+
+    return {
+        "transactions": transactions,
+        "categories": ids,
+        "households": round(households, 1),
+        "batches": batches,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    from app.backend.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Génère un jeu de données synthétique")
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--months", type=int, default=DEFAULT_MONTHS)
+    parser.add_argument("--end", type=date.fromisoformat, help="dernier jour (AAAA-MM-JJ), aujourd'hui par défaut")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--reset", action="store_true", help="supprime et recrée toutes les tables avant")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = generate(db, args.transactions, args.seed, args.months, args.end, args.reset, args.batch_size)
+    finally:
+        db.close()
+    print(f"{report['transactions']} transactions générées en {report['batches']} lot(s), "
+          f"{len(report['categories'])} catégories, {report['seconds']} s.")
@@ -3,13 +3,18 @@ Logique du code pour les transactions
 Ici utilisation de models.py pour interagir avec la bdd
 """
 
-from sqlalchemy.orm import Session
+import base64
+from typing import NamedTuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
-from app.backend.db.models import Transaction
-from app.backend.db.schemas import TransactionCreate, TransactionUpdate
-from . import services_categories
-from sqlalchemy import func, extract
-from app.backend.db.models import Transaction as TransactionModel, Category
+from app.backend.db.models import Category, Transaction
+from app.backend.db.schemas import TransactionBatch, TransactionCreate, TransactionUpdate
+from . import services_balance, services_categories, services_category_index, services_rollups, services_versions
+from .services_periods import apply_period, month_range
+from sqlalchemy import func, or_, and_, any_, bindparam, case, delete, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Integer
 
 
 def create_transaction(db: Session, data: TransactionCreate):
@@ -17,8 +22,11 @@ def create_transaction(db: Session, data: TransactionCreate):
     Creation d'une transaction
     return: la transaction créée
     """
-    txn = Transaction(**data.dict())
+    txn = Transaction(**data.model_dump())
     db.add(txn)
+    services_rollups.apply_deltas(db, services_rollups.transaction_deltas([txn]))
+    services_balance.invalidate_from(db, txn.date)
+    services_versions.bump(db, services_versions.TRANSACTIONS)
     db.commit()
     db.refresh(txn)
     return txn
@@ -29,10 +37,20 @@ def update_transaction(db: Session, transaction: Transaction, data: TransactionU
     Modification d'une transaction
     return: la transaction modifiée
     """
+    # L'agrégat mensuel retire l'ancienne version et ajoute la nouvelle
+    # (gère les changements de mois ou de catégorie)
+    before = services_rollups.transaction_deltas([transaction], sign=-1)
+    old_date = transaction.date
 
-    for key, value in data.dict(exclude_unset=True).items():
+    for key, value in data.model_dump(exclude_unset=True).items():
         setattr(transaction, key, value)
 
+    after = services_rollups.transaction_deltas([transaction])
+    services_rollups.apply_deltas(db, services_rollups.merge_deltas(before, after))
+    # Écriture antidatée : seuls les snapshots postérieurs sont recalculés
+    services_balance.invalidate_from(db, old_date, transaction.date)
+    services_versions.bump(db, services_versions.TRANSACTIONS)
+
     db.commit()
     db.refresh(transaction)
     return transaction
@@ -43,11 +61,122 @@ def delete_transaction(db: Session, transaction: Transaction):
     Suppression d'une transaction
     return: True si la suppression a réussi, False sinon
     """
+    services_rollups.apply_deltas(db, services_rollups.transaction_deltas([transaction], sign=-1))
+    services_balance.invalidate_from(db, transaction.date)
+    services_versions.bump(db, services_versions.TRANSACTIONS)
     db.delete(transaction)
     db.commit()
     return True
 
 
+# -----------------------------------------------------
+# MODIFICATIONS EN MASSE (UN SEUL ALLER-RETOUR HTTP)
+# -----------------------------------------------------
+class _RowState(NamedTuple):
+    id: int
+    category_id: int | None
+    date: datetime
+    amount: float
+    label: str | None = None
+
+
+def _ids_predicate(db: Session, ids: list[int]):
+    """
+    id = ANY(:ids) sur PostgreSQL (un seul paramètre tableau), IN (...) ailleurs.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return Transaction.id == any_(bindparam("batch_ids", list(ids), type_=ARRAY(Integer)))
+    return Transaction.id.in_(ids)
+
+
+def _filter_predicate(db: Session, category_id: int | None, period: str | None):
+    """
+    Prédicat équivalent aux filtres du listing (sous-arbre de catégories + période).
+    """
+    ids = select(Transaction.id)
+    if category_id:
+        index = services_category_index.get_index(db)
+        ids = ids.filter(Transaction.category_id.in_(index.subtree_ids(category_id)))
+    ids = apply_period(ids, Transaction.date, period)
+    return Transaction.id.in_(ids)
+
+
+def _apply_set_operation(db: Session, predicate, patch: dict | None, summary: dict):
+    """
+    Applique un UPDATE (patch) ou un DELETE ensembliste sur les lignes visées.
+    L'état avant modification est lu en une requête pour tenir l'agrégat mensuel
+    et les snapshots de solde à jour, puis l'état après est déduit du patch.
+    return: les ids touchés
+    """
+    before = db.execute(
+        select(Transaction.id, Transaction.category_id, Transaction.date, Transaction.amount)
+        .where(predicate)
+    ).all()
+    if not before:
+        return set()
+
+    deltas = [services_rollups.transaction_deltas(before, sign=-1)]
+    touched_dates = [r.date for r in before]
+
+    if patch is None:
+        db.execute(delete(Transaction).where(predicate).execution_options(synchronize_session=False))
+        summary["deleted"] += len(before)
+    else:
+        db.execute(update(Transaction).where(predicate).values(**patch).execution_options(synchronize_session=False))
+        after = [_RowState(**{**r._asdict(), **patch}) for r in before]
+        deltas.append(services_rollups.transaction_deltas(after))
+        touched_dates += [r.date for r in after]
+        summary["updated"] += len(before)
+
+    services_rollups.apply_deltas(db, services_rollups.merge_deltas(*deltas))
+    services_balance.invalidate_from(db, *touched_dates)
+    services_versions.bump(db, services_versions.TRANSACTIONS)
+    return {r.id for r in before}
+
+
+def _validated_patch(db: Session, patch: TransactionUpdate | None) -> dict:
+    values = patch.model_dump(exclude_unset=True) if patch else {}
+    if not values:
+        raise ValueError("Patch vide")
+    category_id = values.get("category_id")
+    if category_id is not None and services_category_index.get_index(db).get(category_id) is None:
+        raise ValueError(f"Catégorie inconnue : {category_id}")
+    return values
+
+
+def batch_update_transactions(db: Session, batch: TransactionBatch) -> dict:
+    """
+    Exécute un lot de modifications/suppressions en une seule transaction SQL,
+    avec des UPDATE / DELETE ensemblistes (pas de lecture ni de commit par ligne).
+    Lève ValueError si le lot est invalide (rien n'est alors écrit).
+    return: { updated, deleted, not_found }
+    """
+    summary = {"updated": 0, "deleted": 0, "not_found": []}
+
+    try:
+        for operation in batch.operations:
+            if not operation.ids:
+                continue
+            patch = _validated_patch(db, operation.patch) if operation.op == "update" else None
+            touched = _apply_set_operation(db, _ids_predicate(db, operation.ids), patch, summary)
+            summary["not_found"].extend(i for i in operation.ids if i not in touched)
+
+        if batch.filter is not None:
+            if not batch.delete and batch.patch is None:
+                raise ValueError("Un filtre doit être accompagné d'un patch ou de delete=true")
+            patch = None if batch.delete else _validated_patch(db, batch.patch)
+            predicate = _filter_predicate(db, batch.filter.category_id, batch.filter.period)
+            _apply_set_operation(db, predicate, patch, summary)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    summary["not_found"] = sorted(set(summary["not_found"]))
+    return summary
+
+
 def get_transactions(
     db: Session,
     category_id: int | None = None,
@@ -58,7 +187,12 @@ def get_transactions(
     - Si category_id est un Parent, récupère aussi les transactions des Enfants.
     """
     # On fait une jointure explicite pour pouvoir filtrer sur le parent
-    query = db.query(Transaction).join(Category, Transaction.category_id == Category.id)
+    # (catégorie et parent chargés dans la même requête, pas de lazy load ensuite)
+    query = (
+        db.query(Transaction)
+        .join(Category, Transaction.category_id == Category.id)
+        .options(joinedload(Transaction.category).joinedload(Category.parent))
+    )
 
     if category_id is not None:
         # La magie est ici : On prend la transaction SI :
@@ -72,12 +206,253 @@ def get_transactions(
         )
 
     if search:
-        query = query.filter(TransactionModel.label.op("REGEXP")(search))
+        predicate, _ = search_clauses(db, search)
+        query = query.filter(predicate)
 
 
     return query.all()
 
 
+# -----------------------------------------------------
+# RECHERCHE SUR LE LIBELLÉ
+# -----------------------------------------------------
+SEARCH_MAX_LENGTH = 100
+
+
+LIKE_ESCAPE = "!"
+
+
+def _escape_like(term: str) -> str:
+    """
+    Neutralise % et _ saisis par l'utilisateur (recherche littérale).
+    """
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def search_clauses(db: Session, search: str):
+    """
+    Prédicat et score de pertinence d'une recherche sur le libellé.
+    - PostgreSQL : sous-chaîne (ILIKE) ou correspondance approchée (word_similarity,
+      tolère les fautes de frappe), servies par l'index GIN pg_trgm ; un libellé
+      qui commence par le terme passe devant.
+    - SQLite (local) : LIKE sous-chaîne, préfixes en premier, pas d'approché.
+    return: (prédicat, score) ; trier sur score DESC
+    """
+    term = search.strip()
+    escaped = _escape_like(term)
+    contains = Transaction.label.ilike(f"%{escaped}%", escape=LIKE_ESCAPE)
+    prefix = Transaction.label.ilike(f"{escaped}%", escape=LIKE_ESCAPE)
+
+    if db.get_bind().dialect.name == "postgresql":
+        fuzzy = literal(term).op("<%")(Transaction.label)
+        score = func.word_similarity(term, Transaction.label) + case((prefix, 1.0), (contains, 0.5), else_=0.0)
+        return or_(contains, fuzzy), score
+
+    return contains, case((prefix, 2), else_=1)
+
+
+def encode_search_cursor(offset: int) -> str:
+    """
+    Curseur du mode recherche : résultats triés par pertinence, donc position = rang.
+    """
+    return base64.urlsafe_b64encode(f"search|{offset}".encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> int:
+    try:
+        kind, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        if kind != "search" or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Curseur invalide : {cursor}") from e
+
+
+# -----------------------------------------------------
+# LISTING PAGINÉ (KEYSET SUR date DESC, id DESC)
+# -----------------------------------------------------
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(txn_date: datetime, txn_id: int) -> str:
+    """
+    Encode la position (date, id) de la dernière ligne servie en curseur opaque.
+    """
+    raw = f"{txn_date.isoformat()}|{txn_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Décode un curseur produit par encode_cursor.
+    Lève ValueError si le curseur est invalide.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Curseur invalide : {cursor}") from e
+
+
+def transaction_rows_query():
+    """
+    Projection commune (listing, aperçu) : colonnes de la transaction seules.
+    Nom, type et parent de la catégorie sont résolus via l'index des catégories
+    en mémoire (services_category_index) : ni jointure, ni lazy load.
+    """
+    return (
+        select(
+            Transaction.id,
+            Transaction.label,
+            Transaction.amount,
+            Transaction.date,
+            Transaction.category_id,
+        )
+        .filter(Transaction.category_id.isnot(None))
+    )
+
+
+def build_transactions_query(
+    db: Session,
+    category_id: int | None = None,
+    period: str | None = "current_month",
+    search: str | None = None,
+    index: services_category_index.CategoryIndex | None = None,
+):
+    """
+    Requête (select) de base du listing : filtres catégorie (parent inclus) et
+    période, triée sur (date DESC, id DESC) pour la pagination par curseur.
+    Avec search : filtrée sur le libellé et triée par pertinence d'abord.
+    index : index des catégories déjà chargé (obligatoire sur une AsyncSession)
+    """
+    query = transaction_rows_query()
+
+    if category_id:
+        # La catégorie et ses sous-catégories, résolues depuis l'index
+        index = index or services_category_index.get_index(db)
+        query = query.filter(Transaction.category_id.in_(index.subtree_ids(category_id)))
+
+    query = apply_period(query, Transaction.date, period)
+
+    if search:
+        predicate, score = search_clauses(db, search)
+        return query.filter(predicate).order_by(score.desc(), Transaction.date.desc(), Transaction.id.desc())
+
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+
+def serialize_transaction(row, index: services_category_index.CategoryIndex) -> dict:
+    """
+    Format renvoyé par le listing (utilisé aussi par le mode NDJSON).
+    row: une ligne de transaction_rows_query
+    """
+    category = index.get(row.category_id)
+    return {
+        "id": row.id,
+        "label": row.label,
+        "amount": row.amount,
+        "date": row.date.strftime("%d/%m/%Y"), # Format affichage FR
+        "category_name": category.name if category else "Autre",
+        "parent_name": index.parent_name(row.category_id) or "Autre",
+        "category_type": category.type if category else "depense",
+        "category_id": row.category_id,
+        "date_raw": row.date
+    }
+
+
+def _page_statement(query, limit: int, cursor: str | None, search: str | None):
+    """
+    Restreint la requête du listing à une page (une ligne de plus que limit,
+    pour savoir s'il reste une page).
+    return: (requête, rang de départ en mode recherche, sinon None)
+    """
+    if search:
+        offset = decode_search_cursor(cursor) if cursor else 0
+        return query.offset(offset).limit(limit + 1), offset
+
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                Transaction.date < last_date,
+                and_(Transaction.date == last_date, Transaction.id < last_id),
+            )
+        )
+    return query.limit(limit + 1), None
+
+
+def _page(rows, index: services_category_index.CategoryIndex, limit: int, offset: int | None):
+    if offset is not None:
+        next_cursor = encode_search_cursor(offset + limit) if len(rows) > limit else None
+        return [serialize_transaction(t, index) for t in rows[:limit]], next_cursor
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].date, rows[-1].id) if has_more else None
+    return [serialize_transaction(t, index) for t in rows], next_cursor
+
+
+def list_transactions_page(
+    db: Session,
+    category_id: int | None = None,
+    period: str | None = "current_month",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    search: str | None = None,
+):
+    """
+    Retourne une page de transactions et le curseur de la page suivante.
+    Le curseur est la position (date, id) de la dernière ligne : la page suivante
+    repart strictement après elle, sans OFFSET, donc à coût constant.
+    En mode recherche (tri par pertinence), le curseur porte le rang de départ.
+    return: (liste de dicts, next_cursor ou None)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    index = services_category_index.get_index(db)
+    query = build_transactions_query(db, category_id, period, search, index)
+    statement, offset = _page_statement(query, limit, cursor, search)
+    return _page(db.execute(statement).all(), index, limit, offset)
+
+
+async def list_transactions_page_async(
+    db: AsyncSession,
+    category_id: int | None = None,
+    period: str | None = "current_month",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    search: str | None = None,
+):
+    """
+    list_transactions_page pour les routes async : même requête, exécutée par
+    await db.execute (la boucle d'événements reste libre pendant l'aller-retour).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    index = await services_category_index.get_index_async(db)
+    query = build_transactions_query(db, category_id, period, search, index)
+    statement, offset = _page_statement(query, limit, cursor, search)
+    return _page((await db.execute(statement)).all(), index, limit, offset)
+
+
+def iter_transactions(
+    db: Session,
+    category_id: int | None = None,
+    period: str | None = "current_month",
+    search: str | None = None,
+):
+    """
+    Parcourt toutes les transactions filtrées via un curseur côté serveur
+    (stream_results) par lots de STREAM_BATCH_SIZE : la mémoire reste bornée.
+    """
+    index = services_category_index.get_index(db)
+    query = build_transactions_query(db, category_id, period, search, index)
+    rows = db.execute(query, execution_options={"yield_per": STREAM_BATCH_SIZE})
+    for t in rows:
+        yield serialize_transaction(t, index)
+
+
 def get_transaction(db: Session, transaction_id: int):
     """
     Récupère une transaction par son ID
@@ -91,13 +466,8 @@ def get_transactions_by_month(db: Session, year: int, month: int):
     Récupère toutes les transactions d'un mois précis.
     Utile pour les graphiques du dashboard.
     """
-    return db.query(Transaction).filter(extract('year', Transaction.date) == year).filter(extract('month', Transaction.date) == month).all()
-
-def get_recent_transactions(db: Session, limit: int = 3):
-    """
-    Récupère les dernières transactions pour l'aperçu.
-    """
-    return db.query(Transaction).order_by(Transaction.date.desc()).limit(limit).all()
+    start, end = month_range(year, month)
+    return db.query(Transaction).filter(Transaction.date >= start, Transaction.date < end).all()
 
 def get_transactions_overview(db: Session):
     """
@@ -109,16 +479,17 @@ def get_transactions_overview(db: Session):
     - total_expenses
     - total_revenues
     """
-    transactions = get_transactions(db)
-    categories = services_categories.get_categories(db)
+    index = services_category_index.get_index(db)
+    rows = db.execute(build_transactions_query(db, period="all", index=index)).all()
+    transactions = [serialize_transaction(r, index) for r in rows]
+    categories = services_categories.get_categories_compact(db)
     total_transactions = len(transactions)
     total_categories = len(categories)
     total_expenses = sum(
-        t.amount for t in transactions if t.category and t.category.type == "depense"
+        t["amount"] for t in transactions if t["category_type"] == "depense"
     )
     total_revenues = sum(
-        t.amount for t in transactions
-        if t.category and t.category.type == "revenu"
+        t["amount"] for t in transactions if t["category_type"] == "revenu"
     )
 
     return {
@@ -129,53 +500,3 @@ def get_transactions_overview(db: Session):
         "total_expenses": total_expenses,
         "total_revenues": total_revenues,
     }
-
-# -----------------------------------------------------
-# NOUVELLE FONCTION POUR LE CALCUL PAR CATÉGORIE
-# -----------------------------------------------------
-def get_total_amount_by_category(db: Session):
-    """
-    Calcule la somme des montants pour chaque catégorie.
-    Retourne un dictionnaire {category_id: total_amount}
-    """
-    totals = (
-        db.query(
-            TransactionModel.category_id,
-            func.sum(TransactionModel.amount).label("total_amount"),
-        )
-        .join(Category, TransactionModel.category_id == Category.id)
-        .group_by(TransactionModel.category_id)
-        .all()
-    )
-
-    # Convertit la liste de tuples en dictionnaire pour un accès facile
-    totals_map = {category_id: total for category_id, total in totals}
-    return totals_map
-
-# -----------------------------------------------------
-# ANCIENNE FONCTION INUTILE MAIS CONSERVÉE SI ELLE EST UTILISÉE AILLEURS
-# -----------------------------------------------------
-def get_categories_with_totals(db: Session):
-    """
-    Retourne la liste des catégories avec un attribut supplémentaire :
-    - total_amount : somme des montants des transactions de cette catégorie
-    """
-    categories = db.query(Category).all()
-
-    # Récupérer les sommes groupées par category_id
-    totals = (
-        db.query(
-            Transaction.category_id,
-            func.sum(Transaction.amount).label("total_amount"),
-        )
-        .group_by(Transaction.category_id)
-        .all()
-    )
-
-    totals_map = {cat_id: total for cat_id, total in totals}
-
-    # On ajoute un attribut dynamique sur chaque objet Category
-    for c in categories:
-        c.total_amount = float(totals_map.get(c.id, 0.0))
-
-    return categories
\ No newline at end of file
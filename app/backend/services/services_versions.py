@@ -0,0 +1,130 @@
+"""
+Versions des données ("transactions", "categories") pour les requêtes conditionnelles.
+
+Chaque écriture appelle bump() avant son commit : le compteur de la table est
+incrémenté dans la même transaction SQL. Une route de lecture lit ces compteurs
+(une requête sur la clé primaire de data_versions) pour construire son ETag et
+répondre 304 sans recalculer quoi que ce soit si rien n'a changé.
+
+Sur PostgreSQL, chaque commit qui a modifié des tables publie aussi un
+événement NOTIFY (tables, catégories et mois touchés), dans la même transaction :
+il n'est délivré que si l'écriture est validée. Les autres processus s'en
+servent pour vider leurs caches (services_invalidation).
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.backend.db.models import DataVersion
+
+TRANSACTIONS = "transactions"
+CATEGORIES = "categories"
+
+# Tables modifiées par la transaction en cours (lu après commit par services_cache)
+CHANGED_TABLES_KEY = "changed_tables"
+# Couples (category_id, mois) touchés, notés par services_rollups.apply_deltas
+CHANGED_KEYS_KEY = "changed_keys"
+
+NOTIFY_CHANNEL = "zadeet_invalidation"
+# Identifie ce processus dans les événements (il ignore les siens)
+PROCESS_ID = uuid.uuid4().hex
+# Au-delà, la liste est remplacée par null ("toutes") : NOTIFY est limité à 8000 octets
+MAX_EVENT_ITEMS = 100
+
+
+def _upsert_statement(db: Session, rows: list[dict]):
+    """
+    INSERT ... ON CONFLICT (table_name) DO UPDATE version = version + 1.
+    Retourne None si le dialecte ne supporte pas l'upsert.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    stmt = dialect_insert(DataVersion).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[DataVersion.table_name],
+        set_={"version": DataVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+
+
+def bump(db: Session, *tables: str):
+    """
+    Incrémente la version des tables modifiées.
+    Ne commit pas : l'appelant commit avec son écriture.
+    """
+    now = datetime.utcnow()
+    rows = [{"table_name": t, "version": 1, "updated_at": now} for t in sorted(set(tables))]
+    if not rows:
+        return
+    db.info.setdefault(CHANGED_TABLES_KEY, set()).update(tables)
+
+    stmt = _upsert_statement(db, rows)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+
+    for row in rows:
+        current = db.get(DataVersion, row["table_name"])
+        if current is None:
+            db.add(DataVersion(**row))
+        else:
+            current.version += 1
+            current.updated_at = now
+    db.flush()
+
+
+# -----------------------------------------------------
+# ÉVÉNEMENTS DE CHANGEMENT (NOTIFY)
+# -----------------------------------------------------
+def _capped(values) -> list | None:
+    values = sorted(values)
+    return values if len(values) <= MAX_EVENT_ITEMS else None
+
+
+def change_event(tables, keys) -> str:
+    """
+    Charge utile JSON : {origin, tables, categories, months}.
+    """
+    return json.dumps({
+        "origin": PROCESS_ID,
+        "tables": sorted(tables),
+        "categories": _capped({c for c, _ in keys if c is not None}),
+        "months": _capped({m.strftime("%Y-%m") for _, m in keys}),
+    }, separators=(",", ":"))
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_before_commit(session: Session):
+    keys = session.info.pop(CHANGED_KEYS_KEY, ())
+    tables = session.info.get(CHANGED_TABLES_KEY)
+    if not tables or session.get_bind().dialect.name != "postgresql":
+        return
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": NOTIFY_CHANNEL, "payload": change_event(tables, keys)},
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_keys_after_rollback(session: Session):
+    session.info.pop(CHANGED_KEYS_KEY, None)
+
+
+def get_versions(db: Session, tables: tuple[str, ...]) -> dict[str, tuple[int, datetime | None]]:
+    """
+    {table: (version, date de dernière modification)} ; (0, None) si jamais modifiée.
+    """
+    rows = db.query(DataVersion.table_name, DataVersion.version, DataVersion.updated_at)\
+        .filter(DataVersion.table_name.in_(tables))\
+        .all()
+    found = {r.table_name: (r.version, r.updated_at) for r in rows}
+    return {t: found.get(t, (0, None)) for t in tables}
@@ -0,0 +1,114 @@
+"""
+Débit des routes async (AsyncSession) face à leur équivalent synchrone (threadpool).
+
+Lance deux serveurs uvicorn sur la même base :
+- l'API réelle (routes "async def"),
+- sync_app ci-dessous : les mêmes services derrière des routes "def" + SessionLocal,
+  comme avant le passage en async,
+puis envoie le même nombre de requêtes avec une forte concurrence et affiche
+requêtes/s et latences.
+
+Usage (base déjà remplie, ex : python seed_db.py) :
+    DATABASE_URL=postgresql://... python -m benchmarks.async_vs_sync --concurrency 200 --requests 4000
+"""
+
+import argparse
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Depends, FastAPI
+from sqlalchemy.orm import Session
+
+from app.backend.db.database import SessionLocal
+from app.backend.services import services_accueil, services_transactions
+from .common import latency_summary, start_server, stop_server
+
+PATHS = ("/api/dashboard/stats", "/api/transactions/?period=all&limit=50")
+
+
+# -----------------------------------------------------
+# VARIANTE SYNCHRONE DE RÉFÉRENCE
+# -----------------------------------------------------
+sync_app = FastAPI(title="Zadeet API (sync, benchmark)")
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@sync_app.get("/api/dashboard/stats")
+def sync_stats(db: Session = Depends(get_db)):
+    return {
+        "balance": services_accueil.get_total_balance(db),
+        "charts": {
+            "bar": services_accueil.get_last_3_months_stats(db),
+            "pie": services_accueil.get_category_pie_stats(db),
+        },
+        "category_totals": services_accueil.get_category_totals(db),
+    }
+
+
+@sync_app.get("/api/transactions/")
+def sync_transactions(period: str = "all", limit: int = 50, db: Session = Depends(get_db)):
+    items, next_cursor = services_transactions.list_transactions_page(db, None, period, limit, None)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+# -----------------------------------------------------
+# CHARGE
+# -----------------------------------------------------
+def _worker(port: int, count: int) -> list[float]:
+    latencies = []
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    for i in range(count):
+        start = time.perf_counter()
+        conn.request("GET", PATHS[i % len(PATHS)])
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies
+
+
+def run_load(port: int, concurrency: int, total: int) -> dict:
+    per_worker = max(1, total // concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _worker(port, per_worker), range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return latency_summary([l for worker in results for l in worker], elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les routes async et sync sous forte concurrence")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    report = {}
+    for name, target, port in (
+        ("sync", "benchmarks.async_vs_sync:sync_app", args.port),
+        ("async", "app.backend.main:app", args.port + 1),
+    ):
+        server = start_server(target, port, probe=PATHS[0])
+        try:
+            _worker(port, 20)  # échauffement (pool de connexions, index des catégories)
+            report[name] = run_load(port, args.concurrency, args.requests)
+        finally:
+            stop_server(server)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
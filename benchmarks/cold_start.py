@@ -0,0 +1,94 @@
+"""
+Temps de démarrage à froid de l'API.
+
+Pour chaque essai (nouveau processus à chaque fois) :
+- import : durée de "import app.backend.main" seul ;
+- health : du lancement d'uvicorn à la première réponse 200 de /api/health ;
+- ready  : du lancement d'uvicorn à la première réponse 200 de /api/ready
+  (première connexion à la base comprise).
+Affiche la médiane, le min et le max de chaque mesure.
+
+Usage (schéma déjà migré) :
+    DATABASE_URL=postgresql://... python -m benchmarks.cold_start --runs 5
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import send, stop_server
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.backend.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def _wait_for(port: int, path: str, started: float, process: subprocess.Popen, timeout: float = 60) -> float:
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn s'est arrêté (code {process.returncode})")
+        try:
+            status, _ = send(http.client.HTTPConnection("127.0.0.1", port, timeout=1), "GET", path)
+            if status == 200:
+                return time.perf_counter() - started
+        except OSError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"{path} n'a pas répondu 200 en {timeout} s")
+
+
+def measure_server(port: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.backend.main:app", "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        health = _wait_for(port, "/api/health", started, process)
+        ready = _wait_for(port, "/api/ready", started, process)
+    finally:
+        stop_server(process)
+    return health, ready
+
+
+def _summary(values: list[float]) -> dict:
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 1),
+        "min_ms": round(min(values) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid de l'API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8300)
+    args = parser.parse_args()
+
+    imports, healths, readies = [], [], []
+    for _ in range(args.runs):
+        imports.append(measure_import())
+        health, ready = measure_server(args.port)
+        healths.append(health)
+        readies.append(ready)
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import": _summary(imports),
+        "health": _summary(healths),
+        "ready": _summary(readies),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Outils communs aux benchmarks : serveur uvicorn en sous-processus,
+client HTTP (bibliothèque standard) et statistiques de latence.
+"""
+
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def start_server(target: str, port: int, env: dict | None = None, probe: str = "/api/health",
+                 workers: int = 1) -> subprocess.Popen:
+    """
+    Lance uvicorn sur target (ex : "app.backend.main:app") et attend que probe réponde 200.
+    """
+    command = [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"]
+    if workers > 1:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, env={**os.environ, **(env or {})})
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur {target} s'est arrêté (code {process.returncode})")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            status, _ = send(conn, "GET", probe)
+            if status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Le serveur {target} n'a pas démarré")
+
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def send(conn: http.client.HTTPConnection, method: str, path: str, body: bytes | None = None,
+         headers: dict | None = None) -> tuple[int, bytes]:
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def latency_summary(latencies: list[float], elapsed: float) -> dict:
+    """
+    p50/p95/p99 en ms et débit (requêtes/s) d'une série de mesures.
+    """
+    latencies = sorted(latencies)
+    if len(latencies) >= 2:
+        q = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+    }
@@ -0,0 +1,135 @@
+"""
+Vérifie l'invalidation des caches entre workers (services_invalidation).
+
+Lance l'API avec plusieurs workers uvicorn et un TTL de cache très long (seule
+l'invalidation peut rafraîchir les agrégats), puis pour chaque scénario :
+1. remplit le cache de chaque worker (--probes appels à /api/dashboard/stats,
+   une connexion par appel pour passer par tous les workers) ;
+2. fait une écriture via l'API (servie par un seul worker) ;
+3. rappelle /stats jusqu'à --probes réponses à jour d'affilée.
+Affiche le nombre de réponses périmées et le délai de propagation ; code de
+sortie 1 si un worker sert encore l'ancienne valeur après --timeout secondes.
+
+Scénarios : création d'une transaction (solde), renommage d'une catégorie
+(totaux par catégorie).
+
+Usage (recrée la base indiquée par DATABASE_URL, SQLite par défaut) :
+    python -m benchmarks.invalidation --workers 2
+    DATABASE_URL=postgresql://... python -m benchmarks.invalidation --workers 4
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import time
+
+from .common import send, start_server, stop_server
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmarks/invalidation.db"
+STATS = "/api/dashboard/stats"
+
+
+def _request(port: int, method: str, path: str, payload=None) -> dict:
+    # Nouvelle connexion à chaque appel : le noyau répartit entre les workers
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        body = json.dumps(payload).encode() if payload is not None else None
+        status, data = send(conn, method, path, body, {"Content-Type": "application/json"} if body else None)
+    finally:
+        conn.close()
+    if status >= 400:
+        raise RuntimeError(f"{method} {path} : HTTP {status}")
+    return json.loads(data)
+
+
+def _balance(stats: dict):
+    return round(stats["balance"], 2)
+
+
+def _category_names(stats: dict):
+    return sorted(row["category_name"] for row in stats["category_totals"])
+
+
+def run_scenario(port: int, name: str, read, write, probes: int, timeout: float) -> dict:
+    before = {json.dumps(read(_request(port, "GET", STATS))) for _ in range(probes)}
+    if len(before) != 1:
+        raise RuntimeError(f"{name} : réponses divergentes avant l'écriture")
+    before = before.pop()
+
+    write()
+    written = time.perf_counter()
+
+    fresh_streak = stale = 0
+    last_stale = None
+    while fresh_streak < probes:
+        if time.perf_counter() - written > timeout:
+            return {"scenario": name, "ok": False, "stale_responses": stale}
+        if json.dumps(read(_request(port, "GET", STATS))) == before:
+            stale += 1
+            fresh_streak = 0
+            last_stale = time.perf_counter()
+        else:
+            fresh_streak += 1
+    return {
+        "scenario": name,
+        "ok": True,
+        "stale_responses": stale,
+        "propagation_ms": round((last_stale - written) * 1000, 1) if last_stale else 0.0,
+    }
+
+
+def run(port: int, categories: dict[str, int], probes: int, timeout: float) -> list[dict]:
+    """
+    Les deux scénarios contre un serveur déjà lancé (aussi utilisé par tests/test_invalidation.py).
+    """
+    def add_transaction():
+        _request(port, "POST", "/api/transactions/", {
+            "label": "Contrôle invalidation", "amount": 1234.56,
+            "category_id": categories["Salaire"], "date": "2020-01-15T12:00:00",
+        })
+
+    def rename_category():
+        _request(port, "PUT", f"/api/categories/{categories['Courses']}", {"name": "Courses (renommée)"})
+
+    return [
+        run_scenario(port, "transaction", _balance, add_transaction, probes, timeout),
+        run_scenario(port, "categorie", _category_names, rename_category, probes, timeout),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Invalidation des caches entre workers uvicorn")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--probes", type=int, default=40, help="appels par vérification")
+    parser.add_argument("--timeout", type=float, default=10, help="délai max de propagation, en s")
+    parser.add_argument("--port", type=int, default=8400)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+    from app.backend.db.database import SessionLocal
+    from app.backend.services import services_synthetic
+
+    db = SessionLocal()
+    try:
+        categories = services_synthetic.generate(db, args.transactions, reset=True)["categories"]
+    finally:
+        db.close()
+
+    server = start_server("app.backend.main:app", args.port, env={"RESULT_CACHE_TTL": "3600"},
+                          probe="/api/ready", workers=args.workers)
+    try:
+        results = run(args.port, categories, args.probes, args.timeout)
+    finally:
+        stop_server(server)
+
+    print(json.dumps({"workers": args.workers, "results": results}, indent=2, ensure_ascii=False))
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
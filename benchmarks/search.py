@@ -0,0 +1,105 @@
+"""
+Recherche sur les libellés : latence des requêtes de GET /api/transactions/?search=...
+
+Complète la table jusqu'à --rows transactions (services_synthetic, donc COPY sur
+PostgreSQL), puis mesure list_transactions_page avec un terme de recherche pour
+plusieurs profils : préfixe, sous-chaîne, faute de frappe (approché), terme rare.
+Sur PostgreSQL, affiche aussi le plan (index GIN pg_trgm attendu) et, avec
+--compare-seqscan, la même mesure index désactivé.
+
+Usage :
+    DATABASE_URL=postgresql://... python -m benchmarks.search --rows 1000000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import func, text
+
+from app.backend.db import models
+from app.backend.db.database import SessionLocal, engine
+from app.backend.services import services_synthetic, services_transactions
+
+# Libellés produits par services_synthetic
+QUERIES = {
+    "prefixe": "carre",
+    "sous-chaine": "marché",
+    "approche (faute de frappe)": "carefour",
+    "rare": "camping",
+    "tres frequent": "a",
+}
+
+
+def fill(target_rows: int, seed: int) -> int:
+    """
+    Ajoute des transactions synthétiques jusqu'à target_rows lignes.
+    return: le nombre de lignes ajoutées
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(func.count(models.Transaction.id)).scalar()
+        missing = target_rows - existing
+        if missing <= 0:
+            return 0
+        services_synthetic.generate(db, missing, seed=seed)
+        return missing
+    finally:
+        db.close()
+
+
+def measure(term: str, repeat: int, seqscan: bool = False) -> dict:
+    db = SessionLocal()
+    try:
+        if seqscan:
+            # Reste valable pour toute la transaction de la session (même connexion)
+            db.execute(text("SET LOCAL enable_bitmapscan = off"))
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            items, _ = services_transactions.list_transactions_page(db, None, "all", 50, None, term)
+            timings.append(time.perf_counter() - start)
+        return {
+            "results": len(items),
+            "median_ms": round(statistics.median(timings) * 1000, 2),
+            "max_ms": round(max(timings) * 1000, 2),
+        }
+    finally:
+        db.close()
+
+
+def plan(term: str) -> list[str]:
+    db = SessionLocal()
+    try:
+        query = services_transactions.build_transactions_query(db, None, "all", term).limit(50)
+        compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+        return [r[0] for r in db.execute(text(f"EXPLAIN {compiled}"))]
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la recherche sur les libellés")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare-seqscan", action="store_true")
+    args = parser.parse_args()
+
+    added = fill(args.rows, args.seed)
+    report = {"rows": args.rows, "added": added, "dialect": engine.dialect.name, "queries": {}}
+
+    for name, term in QUERIES.items():
+        report["queries"][name] = {"term": term, **measure(term, args.repeat)}
+
+    if engine.dialect.name == "postgresql":
+        report["plan"] = plan(QUERIES["sous-chaine"])
+        if args.compare_seqscan:
+            report["seqscan"] = {name: measure(term, args.repeat, seqscan=True) for name, term in QUERIES.items()}
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
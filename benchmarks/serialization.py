@@ -0,0 +1,112 @@
+"""
+Coût d'encodage par ligne du listing des transactions : avant / après.
+
+- avant : ce que fait FastAPI pour un dict renvoyé avec response_model
+  (validation Pydantic, jsonable_encoder, json.dumps) ;
+- après : app.backend.api.responses.dumps (orjson, repli json) sur les dicts
+  produits par serialize_transaction.
+Mesure aussi l'arbre des catégories : validation + dump_json par TypeAdapter.
+
+Aucune base n'est nécessaire : les lignes sont synthétiques.
+Usage :
+    python -m benchmarks.serialization --rows 500 --repeat 200
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, NamedTuple
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.backend.api import responses
+from app.backend.db import schemas
+from app.backend.services.services_category_index import CategoryIndex, CategoryNode
+from app.backend.services.services_transactions import serialize_transaction
+
+
+class Row(NamedTuple):
+    id: int
+    label: str
+    amount: float
+    date: datetime
+    category_id: int
+
+
+def _index() -> CategoryIndex:
+    nodes = {1: CategoryNode(1, "Salaire", "revenu", None), 2: CategoryNode(2, "Alimentation", "depense", None)}
+    for i in range(3, 40):
+        nodes[i] = CategoryNode(i, f"Sous-catégorie {i}", "depense", 2)
+        nodes[2].children.append(i)
+    return CategoryIndex(nodes, version=0)
+
+
+def _rows(count: int) -> list[Row]:
+    start = datetime(2026, 1, 1)
+    return [
+        Row(i, f"Achat {i} CARREFOUR", round(random.uniform(1, 300), 2),
+            start + timedelta(minutes=17 * i), random.randrange(1, 40))
+        for i in range(count)
+    ]
+
+
+def _timeit(fn, repeat: int) -> float:
+    fn()  # échauffement
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de sérialisation par ligne (avant / après)")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    index = _index()
+    rows = _rows(args.rows)
+    items = [serialize_transaction(r, index) for r in rows]
+    page_adapter = TypeAdapter(schemas.TransactionPage)
+
+    def before():
+        page = page_adapter.validate_python({"items": items, "next_cursor": None})
+        return json.dumps(jsonable_encoder(page), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def after():
+        return responses.dumps({"items": items, "next_cursor": None})
+
+    def build_rows():
+        return [serialize_transaction(r, index) for r in rows]
+
+    tree = [
+        {"id": n.id, "name": n.name, "type": n.type, "parent_id": n.parent_id, "children": [], "total": 1.5}
+        for n in index.roots()
+    ]
+    tree_adapter = TypeAdapter(List[schemas.CategoryTreeNode])
+
+    report = {
+        "rows": args.rows,
+        "encoder": "orjson" if responses.orjson is not None else "json",
+        "per_row_us": {
+            "build_dicts": round(_timeit(build_rows, args.repeat) / args.rows * 1e6, 3),
+            "before_validate_jsonable_json": round(_timeit(before, args.repeat) / args.rows * 1e6, 3),
+            "after_fast_json": round(_timeit(after, args.repeat) / args.rows * 1e6, 3),
+        },
+        "category_tree_us": {
+            "before_validate_jsonable_json": round(_timeit(
+                lambda: json.dumps(jsonable_encoder(tree_adapter.validate_python(tree))), args.repeat) * 1e6, 1),
+            "after_type_adapter_dump_json": round(_timeit(
+                lambda: tree_adapter.dump_json(tree_adapter.validate_python(tree)), args.repeat) * 1e6, 1),
+        },
+    }
+    per_row = report["per_row_us"]
+    per_row["speedup"] = round(per_row["before_validate_jsonable_json"] / per_row["after_fast_json"], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Latence et débit de chaque route de l'API (transactions, catégories, dashboard).
+
+Déroulé :
+1. recrée la base et la remplit (services_synthetic, graine fixe) à l'échelle demandée ;
+2. compte les requêtes SQL de chaque route, en processus (TestClient + événements
+   moteur), à froid (cache de résultats vidé) puis à chaud ;
+3. lance app.backend.main:app sous uvicorn et envoie --requests appels par route
+   pour chaque niveau de concurrence : p50/p95/p99, débit, erreurs ;
+4. écrit un rapport JSON (commit git, dialecte, échelle...) pour comparer les
+   exécutions entre elles.
+
+Les routes d'écriture travaillent sur leurs propres lignes : les transactions et
+catégories créées par POST servent ensuite aux PUT, /batch puis DELETE.
+
+Usage :
+    python -m benchmarks.suite --scale 100k --concurrency 1,10,50 --output bench.json
+    DATABASE_URL=postgresql://... python -m benchmarks.suite --scale 1m --no-cache
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from .common import latency_summary, send, start_server, stop_server
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmarks/bench.db"
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+class Route(NamedTuple):
+    name: str
+    method: str
+    # (contexte, n° d'appel) -> (chemin, corps, en-têtes)
+    request: Callable[["Context", int], tuple]
+    # (contexte, corps de la réponse) : récupère les ids créés
+    collect: Callable[["Context", bytes], None] | None = None
+
+
+class Context:
+    """
+    Ids partagés entre les routes : catégories du jeu de données,
+    lignes créées par les POST et consommées par PUT / DELETE.
+    """
+
+    def __init__(self, categories: dict[str, int], cursor: str | None):
+        self.categories = categories
+        self.cursor = cursor
+        self.transactions: list[int] = []
+        self.created_categories: list[int] = []
+        self.lock = threading.Lock()
+
+    def add(self, kind: str, identifier: int):
+        with self.lock:
+            getattr(self, kind).append(identifier)
+
+    def pick(self, kind: str, i: int) -> int:
+        with self.lock:
+            items = getattr(self, kind)
+            if not items:
+                raise IndexError(kind)
+            return items[i % len(items)]
+
+    def pop(self, kind: str) -> int:
+        with self.lock:
+            return getattr(self, kind).pop()
+
+
+def _json(payload) -> tuple[bytes, dict]:
+    return json.dumps(payload).encode(), {"Content-Type": "application/json"}
+
+
+def _multipart(filename: str, content: bytes) -> tuple[bytes, dict]:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def _import_csv(ctx: Context, rows: int = 50) -> bytes:
+    lines = ["date;label;amount;category_id"]
+    lines += [f"{datetime.now():%Y-%m-%d %H:%M:%S};Import bench {i};{i % 90 + 1}.50;{ctx.categories['Courses']}"
+              for i in range(rows)]
+    return "\n".join(lines).encode()
+
+
+def _get(path: str) -> Callable:
+    return lambda ctx, i: (path.format(ctx=ctx, c=ctx.categories), None, {})
+
+
+def _collect(kind: str) -> Callable:
+    return lambda ctx, body: ctx.add(kind, json.loads(body)["id"])
+
+
+def _transaction(ctx: Context, i: int) -> dict:
+    return {"label": f"Bench {i}", "amount": 12.5, "category_id": ctx.categories["Restaurant"],
+            "date": datetime.now().isoformat()}
+
+
+ROUTES = [
+    # --- Transactions
+    Route("GET /api/transactions/", "GET", _get("/api/transactions/?period=all&limit=50")),
+    Route("GET /api/transactions/ (mois courant)", "GET", _get("/api/transactions/")),
+    Route("GET /api/transactions/ (catégorie)", "GET",
+          _get("/api/transactions/?period=all&limit=50&category_id={c[Alimentation]}")),
+    Route("GET /api/transactions/ (curseur)", "GET",
+          lambda ctx, i: (f"/api/transactions/?period=all&limit=50&cursor={ctx.cursor}", None, {})),
+    Route("GET /api/transactions/ (search)", "GET", _get("/api/transactions/?period=all&limit=50&search=carre")),
+    Route("GET /api/transactions/ (ndjson)", "GET",
+          _get("/api/transactions/?period=current_month&format=ndjson&category_id={c[Courses]}")),
+    Route("POST /api/transactions/", "POST",
+          lambda ctx, i: ("/api/transactions/", *_json(_transaction(ctx, i))), _collect("transactions")),
+    Route("POST /api/transactions/import", "POST",
+          lambda ctx, i: ("/api/transactions/import", *_multipart("bench.csv", _import_csv(ctx)))),
+    Route("POST /api/transactions/batch", "POST",
+          lambda ctx, i: ("/api/transactions/batch", *_json({"operations": [{
+              "op": "update",
+              "ids": [ctx.pick("transactions", i + k) for k in range(5)],
+              "patch": {"category_id": ctx.categories["Courses"]},
+          }]}))),
+    Route("PUT /api/transactions/{id}", "PUT",
+          lambda ctx, i: (f"/api/transactions/{ctx.pick('transactions', i)}", *_json({"amount": 20 + i % 50}))),
+    Route("DELETE /api/transactions/{id}", "DELETE",
+          lambda ctx, i: (f"/api/transactions/{ctx.pop('transactions')}", None, {})),
+    # --- Catégories
+    Route("GET /api/categories/", "GET", _get("/api/categories/")),
+    Route("GET /api/categories/tree", "GET", _get("/api/categories/tree")),
+    Route("GET /api/categories/tree?with_totals", "GET", _get("/api/categories/tree?with_totals=true")),
+    Route("GET /api/categories/{id}", "GET", _get("/api/categories/{c[Alimentation]}")),
+    Route("GET /api/categories/{id}?include=transactions", "GET",
+          _get("/api/categories/{c[Alimentation]}?include=transactions")),
+    Route("POST /api/categories/", "POST",
+          lambda ctx, i: ("/api/categories/", *_json({
+              "name": f"Bench {uuid.uuid4().hex[:12]}", "type": "depense", "parent_id": ctx.categories["Loisirs"],
+          })), _collect("created_categories")),
+    Route("PUT /api/categories/{id}", "PUT",
+          lambda ctx, i: (f"/api/categories/{ctx.pick('created_categories', i)}",
+                          *_json({"name": f"Bench {uuid.uuid4().hex[:12]}"}))),
+    Route("DELETE /api/categories/{id}", "DELETE",
+          lambda ctx, i: (f"/api/categories/{ctx.pop('created_categories')}", None, {})),
+    # --- Dashboard
+    Route("GET /api/dashboard/stats", "GET", _get("/api/dashboard/stats")),
+    Route("GET /api/dashboard/category-totals/", "GET", _get("/api/dashboard/category-totals/?period=last_3_months")),
+    Route("GET /api/dashboard/series", "GET", _get("/api/dashboard/series?months=12")),
+    Route("GET /api/dashboard/series (week)", "GET", _get("/api/dashboard/series?months=3&granularity=week")),
+]
+
+
+# -----------------------------------------------------
+# NOMBRE DE REQUÊTES SQL (en processus)
+# -----------------------------------------------------
+def count_queries(ctx: Context, repeat: int = 2) -> dict:
+    """
+    Requêtes SQL par appel : froid (cache de résultats vidé) puis chaud.
+    Compte sur tous les moteurs (primaire, réplica, async).
+    """
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.backend.db import async_database, database
+    from app.backend.main import app
+    from app.backend.services.services_cache import result_cache
+
+    counter = {"n": 0}
+
+    def on_execute(*_args):
+        counter["n"] += 1
+
+    engines = {
+        database.engine, database.read_engine,
+        async_database.async_engine.sync_engine, async_database.async_read_engine.sync_engine,
+    }
+    for e in engines:
+        event.listen(e, "before_cursor_execute", on_execute)
+
+    report = {}
+    try:
+        with TestClient(app) as client:
+            for route in ROUTES:
+                counts = []
+                for i in range(repeat):
+                    if i == 0:
+                        result_cache.clear()
+                    path, body, headers = route.request(ctx, i)
+                    counter["n"] = 0
+                    response = client.request(route.method, path, content=body, headers=headers)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{route.name} : HTTP {response.status_code} {response.text[:200]}")
+                    if route.collect:
+                        route.collect(ctx, response.content)
+                    counts.append(counter["n"])
+                report[route.name] = {"cold": counts[0], "warm": counts[-1]}
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", on_execute)
+    return report
+
+
+# -----------------------------------------------------
+# CHARGE (serveur uvicorn)
+# -----------------------------------------------------
+def _worker(port: int, route: Route, ctx: Context, calls: range) -> tuple[list[float], int]:
+    latencies, errors = [], 0
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    try:
+        for i in calls:
+            try:
+                path, body, headers = route.request(ctx, i)
+            except IndexError:
+                # Plus de ligne disponible : les POST précédents en ont créé moins que prévu
+                errors += 1
+                continue
+            start = time.perf_counter()
+            status, content = send(conn, route.method, path, body, headers)
+            elapsed = time.perf_counter() - start
+            if status >= 400:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            if route.collect:
+                route.collect(ctx, content)
+    finally:
+        conn.close()
+    return latencies, errors
+
+
+def run_route(port: int, route: Route, ctx: Context, concurrency: int, total: int) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda w: _worker(port, route, ctx, range(w, total, concurrency)), range(concurrency)
+        ))
+    elapsed = time.perf_counter() - start
+
+    summary = latency_summary([l for latencies, _ in results for l in latencies], elapsed)
+    summary["errors"] = sum(errors for _, errors in results)
+    return summary
+
+
+def _first_cursor(port: int) -> str | None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        status, body = send(conn, "GET", "/api/transactions/?period=all&limit=50")
+        return json.loads(body)["next_cursor"] if status == 200 else None
+    finally:
+        conn.close()
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence et débit de chaque route de l'API")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", choices=["10k", "100k", "1m"], default="10k")
+    size.add_argument("--transactions", type=int, help="nombre exact de transactions (remplace --scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", default="1,10,50", help="niveaux de concurrence, séparés par des virgules")
+    parser.add_argument("--requests", type=int, default=200, help="appels par route et par niveau")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--no-cache", action="store_true", help="désactive le cache de résultats (RESULT_CACHE_TTL=0)")
+    parser.add_argument("--skip-load", action="store_true", help="réutilise la base existante")
+    parser.add_argument("--output", help="fichier JSON du rapport (sinon stdout)")
+    args = parser.parse_args()
+
+    # Avant tout import de l'appli : les moteurs lisent l'environnement à l'import
+    os.environ.setdefault("DATABASE_URL", DEFAULT_DATABASE_URL)
+    if args.no_cache:
+        os.environ["RESULT_CACHE_TTL"] = "0"
+
+    from app.backend.db.database import SessionLocal, engine
+    from app.backend.services import services_synthetic
+
+    transactions = args.transactions or SCALES[args.scale]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    db = SessionLocal()
+    try:
+        if args.skip_load:
+            categories = services_synthetic.ensure_categories(db)
+            loaded = {"transactions": None}
+        else:
+            loaded = services_synthetic.generate(db, transactions, seed=args.seed, reset=True)
+            categories = loaded.pop("categories")
+    finally:
+        db.close()
+
+    report = {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "transactions": transactions,
+            "load": loaded,
+            "result_cache": not args.no_cache,
+            "requests_per_route": args.requests,
+            "concurrency": levels,
+        },
+        "queries": {},
+        "latency": {},
+    }
+
+    ctx = Context(categories, cursor=None)
+    server = start_server("app.backend.main:app", args.port, probe="/api/ready")
+    try:
+        ctx.cursor = _first_cursor(args.port)
+        report["queries"] = count_queries(ctx)
+        for level in levels:
+            report["latency"][str(level)] = {
+                route.name: run_route(args.port, route, ctx, level, args.requests) for route in ROUTES
+            }
+            print(f"concurrence {level} : terminé", file=sys.stderr)
+    finally:
+        stop_server(server)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,31 @@
 """
-Seed de la base de données ZADEET :
-- Création de catégories (revenu + dépense)
-- Création de transactions
+Seed de la base de données ZADEET, sans rien supprimer :
+- catégories manquantes de l'arbre de référence,
+- N transactions synthétiques (services_synthetic).
+
+Usage :
+    python seed_db.py [--transactions 500] [--seed 42]
 """
 
-from datetime import date
-from app.db.database import SessionLocal
-from app.db.models import Category, Transaction
+import argparse
 
-db = SessionLocal()
+from app.backend.db.database import SessionLocal
+from app.backend.services import services_synthetic
+
+parser = argparse.ArgumentParser(description="Ajoute des données synthétiques à la base")
+parser.add_argument("--transactions", type=int, default=500)
+parser.add_argument("--seed", type=int, default=42)
+args = parser.parse_args()
 
 print("\n-----------------------------")
 print("   SEEDING DATABASE ZADEET")
 print("-----------------------------\n")
 
-# ---------------------------------------------
-# 1) CATEGORIES (revenus + dépenses)
-# ---------------------------------------------
-categories_data = [
-    {"name": "Salaire", "type": "revenu"},
-    {"name": "Cadeaux / Parents", "type": "revenu"},
-    {"name": "Logement", "type": "depense"},
-    {"name": "Nourriture", "type": "depense"},
-    {"name": "Transports", "type": "depense"},
-    {"name": "Loisirs", "type": "depense"},
-]
-
-categories = {}
-
-print("→ Création des catégories...")
-
-for cat in categories_data:
-    c = Category(**cat)
-    db.add(c)
-    db.commit()
-    db.refresh(c)
-    categories[cat["name"]] = c
-
-print("✔️ Catégories créées.")
-
-# ---------------------------------------------
-# 2) TRANSACTIONS (avec dates)
-# ---------------------------------------------
-transactions_data = [
-    # REVENUS
-    {"label": "Salaire mensuel", "amount": 1200, "category": "Salaire", "date": date(2025, 1, 5)},
-    {"label": "Argent de poche", "amount": 150, "category": "Cadeaux / Parents", "date": date(2025, 1, 12)},
-
-    # DÉPENSES
-    {"label": "Loyer", "amount": 500, "category": "Logement", "date": date(2025, 1, 3)},
-    {"label": "Courses Carrefour", "amount": 85.90, "category": "Nourriture", "date": date(2025, 1, 8)},
-    {"label": "Uber", "amount": 22.50, "category": "Transports", "date": date(2025, 1, 10)},
-    {"label": "Cinéma", "amount": 12.00, "category": "Loisirs", "date": date(2025, 1, 15)},
-]
-
-print("→ Création des transactions...")
-
-for t in transactions_data:
-    txn = Transaction(
-        label=t["label"],
-        amount=t["amount"],
-        category_id=categories[t["category"]].id,
-        date=t["date"],
-    )
-    db.add(txn)
-
-db.commit()
-
-print("✔️ Transactions créées.")
+db = SessionLocal()
+try:
+    report = services_synthetic.generate(db, args.transactions, seed=args.seed)
+finally:
+    db.close()
 
-print("\n-----------------------------")
-print(" Seed terminé avec succès ! ")
-print("-----------------------------\n")
+print(f"✔️ {len(report['categories'])} catégories, {report['transactions']} transactions ajoutées "
+      f"en {report['seconds']} s.")
@@ -0,0 +1,88 @@
+"""
+Fixtures communes.
+
+Les moteurs lisent DATABASE_URL à l'import : la variable est fixée ici, avant
+tout import de l'appli. Par défaut une base SQLite dans un répertoire
+temporaire (partagée par le moteur synchrone et le moteur aiosqlite, ce qu'une
+base :memory: ne permet pas) ; TEST_DATABASE_URL pour une autre base.
+La base est recréée par les fixtures : ne jamais pointer sur une vraie base.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="zadeet-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_TMP_DIR}/zadeet.db")
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ.setdefault("INVALIDATION_BUS", "off")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.backend.db import async_database, database, migrations  # noqa: E402
+from app.backend.services import services_category_index  # noqa: E402
+from app.backend.services.services_cache import result_cache  # noqa: E402
+
+
+def reset_database():
+    migrations.reset(database.engine)
+    result_cache.clear()
+    services_category_index.invalidate()
+
+
+@pytest.fixture
+def empty_db():
+    """
+    Schéma vierge, à la dernière migration.
+    """
+    reset_database()
+    yield database.engine
+
+
+@pytest.fixture
+def db(empty_db):
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(empty_db):
+    from app.backend.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@contextmanager
+def _count_queries():
+    counter = {"n": 0}
+
+    def on_execute(*_args):
+        counter["n"] += 1
+
+    engines = {
+        database.engine, database.read_engine,
+        async_database.async_engine.sync_engine, async_database.async_read_engine.sync_engine,
+    }
+    for e in engines:
+        event.listen(e, "before_cursor_execute", on_execute)
+    try:
+        yield counter
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", on_execute)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Compte les requêtes SQL émises sur tous les moteurs (sync, async, réplica).
+    Usage : with count_queries() as counter: ... ; counter["n"]
+    """
+    return _count_queries
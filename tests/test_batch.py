@@ -0,0 +1,51 @@
+"""
+/api/transactions/batch par filtre : un filtre invalide ou vide ne touche aucune ligne.
+"""
+
+import pytest
+
+from app.backend.db import models
+from app.backend.services import services_synthetic
+
+
+@pytest.fixture
+def categories(db):
+    return services_synthetic.generate(db, 300, seed=5, months=6)["categories"]
+
+
+def _labels(db) -> set[str]:
+    db.expire_all()
+    return {label for (label,) in db.query(models.Transaction.label).all()}
+
+
+@pytest.mark.parametrize("body", [
+    {"filter": {"period": "curent_month"}, "patch": {"label": "OOPS"}},
+    {"filter": {}, "patch": {"label": "OOPS"}},
+    {"filter": {}, "delete": True},
+    {"filter": {"period": "all"}, "delete": True},
+])
+def test_unscoped_or_invalid_filter_is_rejected(client, db, categories, body):
+    before = db.query(models.Transaction).count()
+    response = client.post("/api/transactions/batch", json=body)
+    assert response.status_code == 422
+    assert db.query(models.Transaction).count() == before
+    assert "OOPS" not in _labels(db)
+
+
+def test_category_filter_only_touches_the_category(client, db, categories):
+    restaurant = categories["Restaurant"]
+    expected = db.query(models.Transaction).filter(models.Transaction.category_id == restaurant).count()
+
+    response = client.post("/api/transactions/batch", json={
+        "filter": {"category_id": restaurant, "period": "all"}, "patch": {"label": "Resto"},
+    })
+    assert response.status_code == 200
+    assert response.json()["updated"] == expected
+    assert db.query(models.Transaction).filter(models.Transaction.label == "Resto").count() == expected
+
+
+def test_explicit_all_deletes_everything(client, db, categories):
+    total = db.query(models.Transaction).count()
+    response = client.post("/api/transactions/batch", json={"filter": {"all": True}, "delete": True})
+    assert response.status_code == 200
+    assert response.json()["deleted"] == total
@@ -0,0 +1,104 @@
+"""
+Import CSV / OFX : même règle de signe pour les deux formats, lignes illisibles rejetées.
+"""
+
+import pytest
+
+from app.backend.db import models
+from app.backend.services import services_synthetic
+
+OFX = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250105<TRNAMT>2450.00<NAME>VIR SALAIRE</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250107<TRNAMT>-54.30<NAME>CARREFOUR</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.fixture
+def categories(db):
+    return services_synthetic.generate(db, 10, seed=1, months=1)["categories"]
+
+
+def _import(client, content: bytes, filename: str, **form):
+    return client.post(
+        "/api/transactions/import",
+        files={"file": (filename, content)},
+        data={k: str(v) for k, v in form.items()},
+    )
+
+
+def _imported(db, label: str) -> models.Transaction:
+    db.expire_all()
+    return db.query(models.Transaction).filter(models.Transaction.label == label).one()
+
+
+def test_ofx_credits_and_debits_use_their_default_category(client, db, categories):
+    response = _import(client, OFX, "releve.ofx",
+                       default_income_category_id=categories["Salaire"],
+                       default_expense_category_id=categories["Courses"])
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+
+    salary, groceries = _imported(db, "VIR SALAIRE"), _imported(db, "CARREFOUR")
+    assert (salary.category_id, salary.amount) == (categories["Salaire"], 2450.0)
+    assert (groceries.category_id, groceries.amount) == (categories["Courses"], 54.3)
+
+
+def test_single_default_category_rejects_the_other_direction(client, db, categories):
+    response = _import(client, OFX, "releve.ofx", default_category_id=categories["Courses"])
+    report = response.json()
+    assert (report["imported"], report["rejected"]) == (1, 1)
+    assert "crédit" in report["errors"][0]["error"]
+    assert _imported(db, "CARREFOUR").amount == 54.3
+
+
+def test_default_category_type_is_checked(client, categories):
+    response = _import(client, OFX, "releve.ofx", default_income_category_id=categories["Courses"])
+    assert response.status_code == 400
+
+
+def test_csv_follows_the_same_sign_rule(client, db, categories):
+    content = (
+        "date;label;amount;category\n"
+        "2025-01-05;Sans catégorie débit;-12,50;\n"
+        "2025-01-06;Courses non signées;30.00;Courses\n"
+        "2025-01-07;Débit sur revenu;-100;Salaire\n"
+    ).encode()
+    report = _import(client, content, "export.csv",
+                     default_expense_category_id=categories["Restaurant"]).json()
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert report["errors"][0]["line"] == 4
+
+    debit = _imported(db, "Sans catégorie débit")
+    assert (debit.category_id, debit.amount) == (categories["Restaurant"], 12.5)
+    assert _imported(db, "Courses non signées").amount == 30.0
+
+
+def test_malformed_csv_line_is_rejected_not_500(client, db, categories):
+    content = (
+        "date;label;amount;category\n"
+        "2025-01-05;Avant;10;Courses\n"
+        f"2025-01-06;{'x' * 200_000};10;Courses\n"  # champ au-delà de csv.field_size_limit()
+        "2025-01-07;Après;10;Courses\n"
+    ).encode()
+    response = _import(client, content, "export.csv")
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert report["errors"][0]["line"] == 3
+
+
+def test_badly_encoded_csv_line_is_rejected_not_400(client, db, categories):
+    content = (
+        "date;label;amount;category\n".encode()
+        + "2025-01-05;Avant;10;Courses\n".encode()
+        + "2025-01-06;Café;10;Courses\n".encode("latin-1")  # pas de l'UTF-8
+        + "2025-01-07;Après;10;Courses\n".encode()
+    )
+    response = _import(client, content, "export.csv")
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert report["errors"][0]["line"] == 3
+    assert "encodage" in report["errors"][0]["error"]
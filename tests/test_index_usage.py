@@ -0,0 +1,101 @@
+"""
+Les filtres de période et de catégorie passent par les index
+(date, category_id) / (category_id, date) de transactions.
+
+La requête réellement émise par le service est capturée (avec ses paramètres)
+puis rejouée sous EXPLAIN QUERY PLAN (SQLite) ou EXPLAIN (PostgreSQL, parcours
+séquentiel désactivé : sur une petite table il serait toujours préféré).
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app.backend.services import (
+    services_accueil, services_balance, services_synthetic, services_transactions,
+)
+
+TRANSACTION_INDEXES = ("ix_transactions_date_category_id", "ix_transactions_category_id_date")
+
+
+@pytest.fixture
+def loaded(db):
+    return services_synthetic.generate(db, 2000, seed=3, months=12)["categories"]
+
+
+def _captured(db, call) -> list[tuple[str, object]]:
+    """
+    Requêtes sur transactions filtrées par date ou catégorie émises par call().
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        reads_transactions = "FROM transactions" in statement or "JOIN transactions" in statement
+        if reads_transactions and ("transactions.date >" in statement
+                                   or "transactions.category_id IN" in statement):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert statements, "aucune requête filtrée capturée"
+    return statements
+
+
+def _plan(db, statement: str, parameters) -> str:
+    conn = db.connection()
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+        return "\n".join(r[0] for r in rows)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(r[-1] for r in rows)
+
+
+def _assert_index_scan(db, call):
+    for statement, parameters in _captured(db, call):
+        plan = _plan(db, statement, parameters)
+        assert any(name in plan for name in TRANSACTION_INDEXES), plan
+        if db.get_bind().dialect.name == "sqlite":
+            # Recherche par plage sur l'index, pas un parcours complet de la table
+            assert "SEARCH transactions USING" in plan, plan
+
+
+def test_listing_period_filter_uses_index(db, loaded):
+    _assert_index_scan(db, lambda: services_transactions.list_transactions_page(db, None, "last_3_months", 50))
+
+
+def test_listing_category_and_period_filter_uses_index(db, loaded):
+    category_id = loaded["Restaurant"]
+    _assert_index_scan(
+        db, lambda: services_transactions.list_transactions_page(db, category_id, "last_3_months", 50)
+    )
+
+
+def test_month_range_uses_index(db, loaded):
+    today = date.today()
+    _assert_index_scan(db, lambda: services_transactions.get_transactions_by_month(db, today.year, today.month))
+
+
+def test_balance_date_range_uses_index(db, loaded):
+    _assert_index_scan(db, lambda: services_balance.balance_between(db, date(date.today().year, 1, 1)))
+
+
+def test_daily_series_uses_index(db, loaded):
+    _assert_index_scan(db, lambda: services_accueil.get_income_expense_series.__wrapped__(db, 2, "day"))
+
+
+def test_pie_current_month_expenses_use_index(db, loaded):
+    # category_id IN (dépenses) + plage du mois en cours
+    _assert_index_scan(db, lambda: services_accueil.get_category_pie_stats.__wrapped__(db))
+
+
+def test_rolling_period_category_totals_use_index(db, loaded):
+    # last_3_months n'est pas aligné sur des mois : lu sur la table brute, pas l'agrégat
+    _assert_index_scan(
+        db, lambda: services_accueil.get_category_totals_filtered.__wrapped__(db, "last_3_months")
+    )
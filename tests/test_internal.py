@@ -0,0 +1,84 @@
+"""
+Routes /internal/* et journal des requêtes lentes.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.backend.api import back_routes_admin
+from app.backend.db import slow_queries
+
+
+def test_internal_routes_are_hidden_without_token(client):
+    # Le client de test n'est ni local ni porteur du jeton
+    assert client.get("/internal/slow-queries").status_code == 404
+    assert client.get("/internal/pool", headers={"X-Internal-Token": "devine"}).status_code == 404
+
+
+def test_internal_routes_accept_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(back_routes_admin, "INTERNAL_TOKEN", "s3cret")
+    assert client.get("/internal/pool", headers={"X-Internal-Token": "nope"}).status_code == 404
+    response = client.get("/internal/slow-queries", headers={"X-Internal-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["log_params"] is False
+
+
+@pytest.fixture
+def log_everything(monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 0)
+    slow_queries.slow_query_log.clear()
+    yield slow_queries.slow_query_log
+    slow_queries.slow_query_log.clear()
+
+
+def _record(db, statement: str, parameters):
+    conn = db.connection()
+    conn.info["slow_query_start"] = 0
+    slow_queries._after_cursor_execute(conn, None, statement, parameters, None, False)
+
+
+def test_slow_query_parameters_are_redacted_by_default(db, log_everything):
+    _record(db, "SELECT * FROM transactions WHERE label = ? AND amount = ?", ("Loyer juin", 812.5))
+    assert log_everything.snapshot()["queries"][0]["parameters"] == ["<str>", "<float>"]
+
+
+def test_empty_statement_is_recorded(db, log_everything):
+    assert slow_queries._verb("   ") == ""
+    _record(db, "   ", ())
+    assert log_everything.snapshot()["recorded"] == 1
+
+
+def test_asyncpg_placeholders_are_rewritten_for_the_explain_connection():
+    statement, parameters = slow_queries._to_pyformat(
+        "SELECT * FROM t WHERE a = $2 AND b = $1 AND label LIKE '%x'", ("un", "deux"), "numeric_dollar",
+    )
+    assert statement == "SELECT * FROM t WHERE a = %s AND b = %s AND label LIKE '%%x'"
+    assert parameters == ("deux", "un")
+
+
+def test_explain_runs_on_the_background_thread(monkeypatch, log_everything):
+    request_thread = threading.get_ident()
+    seen = {}
+
+    def fake_explain(job):
+        seen["thread"] = threading.get_ident()
+        return ["Seq Scan on transactions (actual rows=3)"]
+
+    monkeypatch.setattr(slow_queries, "_run_explain", fake_explain)
+    entry = {"plan": None}
+    log_everything.add(entry)
+    slow_queries.start()
+    try:
+        conn = SimpleNamespace(dialect=SimpleNamespace(paramstyle="pyformat"), engine=SimpleNamespace(url=None))
+        assert slow_queries._submit_explain(entry, conn, "SELECT 1", {})
+        deadline = time.monotonic() + 5
+        while log_everything.snapshot()["queries"][0]["plan"] == slow_queries.PENDING_PLAN:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        slow_queries.stop()
+    assert log_everything.snapshot()["queries"][0]["plan"] == ["Seq Scan on transactions (actual rows=3)"]
+    assert seen["thread"] != request_thread
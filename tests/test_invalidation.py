@@ -0,0 +1,46 @@
+"""
+Invalidation des caches entre workers uvicorn (services_invalidation).
+
+Lance l'API avec plusieurs workers sur la base de test et rejoue les scénarios
+de benchmarks/invalidation.py : après une écriture servie par un worker, tous
+les workers doivent servir des agrégats à jour. Test lent (démarrage de
+uvicorn) : exclu avec -m "not slow". Sur SQLite l'invalidation passe par le
+sondage de data_versions, sur PostgreSQL par LISTEN / NOTIFY.
+"""
+
+import socket
+
+import pytest
+
+from app.backend.services import services_synthetic
+from benchmarks import invalidation
+from benchmarks.common import start_server, stop_server
+
+pytestmark = pytest.mark.slow
+
+WORKERS = 2
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_writes_invalidate_every_worker(db):
+    categories = services_synthetic.generate(db, 500, seed=4, months=6)["categories"]
+    db.close()
+
+    port = _free_port()
+    server = start_server("app.backend.main:app", port, probe="/api/ready", workers=WORKERS, env={
+        # Seule l'invalidation peut rafraîchir les agrégats en cache
+        "RESULT_CACHE_TTL": "3600",
+        "INVALIDATION_BUS": "auto",
+        "INVALIDATION_POLL_SECONDS": "0.2",
+    })
+    try:
+        results = invalidation.run(port, categories, probes=20, timeout=10)
+    finally:
+        stop_server(server)
+
+    assert all(r["ok"] for r in results), results
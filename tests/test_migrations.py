@@ -0,0 +1,84 @@
+"""
+Migrations : base vierge et base existante (schéma d'avant les migrations).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import insert, inspect
+
+from app.backend.db import migrations, models
+from app.backend.db.database import SessionLocal
+from app.backend.services import services_rollups
+
+
+def _baseline_database(engine):
+    """
+    Base telle que créée avant les migrations : categories et transactions seules, remplies.
+    """
+    models.Base.metadata.drop_all(bind=engine)
+    migrations.migration_metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(
+        bind=engine, tables=[models.Category.__table__, models.Transaction.__table__],
+    )
+    with engine.begin() as conn:
+        conn.execute(insert(models.Category), [
+            {"id": 1, "name": "Salaire", "type": "revenu", "parent_id": None},
+            {"id": 2, "name": "Courses", "type": "depense", "parent_id": None},
+        ])
+        conn.execute(insert(models.Transaction), [
+            {"label": f"Ligne {i}", "amount": 10.0 + i, "category_id": 1 + i % 2,
+             "date": datetime(2025, 1 + i % 12, 1 + i % 28, 12)}
+            for i in range(120)
+        ])
+
+
+def test_upgrade_empty_database(empty_db):
+    with empty_db.connect() as conn:
+        assert migrations.pending(conn) == []
+        assert inspect(conn).has_table("monthly_category_totals")
+
+
+def test_upgrade_existing_database_backfills_rollup(empty_db, client):
+    _baseline_database(empty_db)
+
+    applied = migrations.upgrade(empty_db)
+    assert [m.version for m in applied] == [m.version for m in migrations.MIGRATIONS]
+
+    db = SessionLocal()
+    try:
+        assert services_rollups.check_consistency(db) == []
+        assert db.query(models.MonthlyCategoryTotal).count() == len({(i % 2, i % 12) for i in range(120)})
+    finally:
+        db.close()
+
+    stats = client.get("/api/dashboard/category-totals/?period=all").json()
+    assert {row["category_name"]: row["total"] for row in stats} == {
+        "Salaire": sum(10.0 + i for i in range(0, 120, 2)),
+        "Courses": sum(10.0 + i for i in range(1, 120, 2)),
+    }
+    # Rien à réappliquer
+    assert migrations.upgrade(empty_db) == []
+
+
+def _schema(conn) -> dict:
+    inspector = inspect(conn)
+    return {
+        table: (
+            {c["name"] for c in inspector.get_columns(table)},
+            {i["name"] for i in inspector.get_indexes(table)},
+        )
+        for table in inspector.get_table_names() if table != migrations.schema_migrations.name
+    }
+
+
+def test_migrations_match_the_models(empty_db):
+    """
+    Une modification de models.py sans migration correspondante fait échouer ce test.
+    """
+    with empty_db.connect() as conn:
+        migrated = _schema(conn)
+    models.Base.metadata.drop_all(bind=empty_db)
+    migrations.migration_metadata.drop_all(bind=empty_db)
+    models.Base.metadata.create_all(bind=empty_db)
+    with empty_db.connect() as conn:
+        assert _schema(conn) == migrated
@@ -0,0 +1,102 @@
+"""
+Le nombre de requêtes SQL des routes de lecture ne dépend pas du volume de
+données (pas de N+1 sur les catégories ou les parents).
+"""
+
+from sqlalchemy import event
+
+from app.backend.api.back_routes_acc import STATS_SECTIONS
+from app.backend.db.async_database import async_read_engine
+from app.backend.db.database import SessionLocal
+from app.backend.services import services_category_index, services_synthetic
+from app.backend.services.services_cache import result_cache
+
+SMALL, LARGE = 300, 3000
+
+ROUTES = (
+    "/api/transactions/?period=all&limit=50",
+    "/api/transactions/?period=all&limit=200",
+    "/api/transactions/?period=last_3_months&limit=50",
+    "/api/transactions/?period=all&format=ndjson",
+    "/api/categories/",
+    "/api/dashboard/stats",
+    "/api/dashboard/category-totals/?period=all",
+)
+
+
+def _load(transactions: int):
+    db = SessionLocal()
+    try:
+        services_synthetic.generate(db, transactions, seed=7, months=12)
+    finally:
+        db.close()
+
+
+def _counts(client, count_queries) -> dict[str, int]:
+    # Index des catégories chargé une fois par processus : hors du compte
+    client.get("/api/categories/")
+    counts = {}
+    for path in ROUTES:
+        # À froid : le cache des agrégats masquerait les requêtes
+        result_cache.clear()
+        with count_queries() as counter:
+            response = client.get(path)
+        assert response.status_code == 200, path
+        counts[path] = counter["n"]
+    return counts
+
+
+def test_query_count_is_constant(client, count_queries):
+    _load(SMALL)
+    before = _counts(client, count_queries)
+    _load(LARGE - SMALL)
+    after = _counts(client, count_queries)
+    assert after == before
+
+
+def test_category_detail_query_count_is_constant(client, count_queries):
+    _load(SMALL)
+    category_id = client.get("/api/categories/").json()[0]["id"]
+    path = f"/api/categories/{category_id}"
+    with count_queries() as counter:
+        assert client.get(path).status_code == 200
+    before = counter["n"]
+
+    _load(LARGE - SMALL)
+    with count_queries() as counter:
+        assert client.get(path).status_code == 200
+    assert counter["n"] == before
+
+
+def test_replica_index_is_cached_outside_the_read_your_writes_window(db, count_queries, monkeypatch):
+    replica = SessionLocal(info={"read_only": True})
+    try:
+        # Juste après une invalidation (reset de la base) : chargé à chaque appel
+        services_category_index.get_index(replica)
+        with count_queries() as counter:
+            services_category_index.get_index(replica)
+        assert counter["n"] == 1
+
+        monkeypatch.setattr(services_category_index, "_invalidated_at", 0.0)
+        services_category_index.get_index(replica)
+        with count_queries() as counter:
+            services_category_index.get_index(replica)
+        assert counter["n"] == 0
+    finally:
+        replica.close()
+
+
+def test_stats_checks_out_one_connection_per_section(client):
+    result_cache.clear()
+    checkouts = []
+
+    def on_checkout(dbapi_connection, record, proxy):
+        checkouts.append(record)
+
+    event.listen(async_read_engine.sync_engine, "checkout", on_checkout)
+    try:
+        assert client.get("/api/dashboard/stats").status_code == 200
+    finally:
+        event.remove(async_read_engine.sync_engine, "checkout", on_checkout)
+    # conditional_get et la première section partagent la même session
+    assert len(checkouts) == len(STATS_SECTIONS)
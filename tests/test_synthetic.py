@@ -0,0 +1,17 @@
+"""
+Générateur synthétique : le solde reste plausible quel que soit le volume.
+"""
+
+import pytest
+
+from app.backend.services import services_balance, services_synthetic
+
+
+@pytest.mark.parametrize("transactions", [1_000, 20_000])
+def test_balance_stays_plausible_at_any_volume(db, transactions):
+    report = services_synthetic.generate(db, transactions, seed=11, months=12)
+    balance = services_balance.balance_between(db)
+    # Proche de l'équilibre (le salaire du mois en cours peut ne pas être encore versé) :
+    # loin des millions de déficit d'un seul salaire face à N dépenses
+    income = report["households"] * 12 * services_synthetic.RECURRING[0].amount
+    assert abs(balance) < 0.1 * income